@@ -0,0 +1,59 @@
+"""add composite indexes for list and membership queries
+
+Revision ID: 005_add_list_indexes
+Revises: 004_add_note
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '005_add_list_indexes'
+down_revision: Union[str, None] = '004_add_note'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIST_INDEXES = [
+    ('ix_todo_family_id_created_at_id', 'todo', 'created_at', 'ix_todo_family_id'),
+    ('ix_note_family_id_created_at_id', 'note', 'created_at', 'ix_note_family_id'),
+    ('ix_milestone_family_id_event_date_id', 'milestone', 'event_date', 'ix_milestone_family_id'),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, table_name, sort_column, _ in LIST_INDEXES:
+            op.create_index(
+                index_name, table_name,
+                ['family_id', sa.text(f'{sort_column} DESC'), sa.text('id DESC')],
+                unique=False, postgresql_concurrently=True, if_not_exists=True
+            )
+        op.create_index(
+            'ix_family_member_user_id_family_id', 'family_member', ['user_id', 'family_id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+        for _, table_name, _, old_index_name in LIST_INDEXES:
+            op.drop_index(
+                old_index_name, table_name=table_name,
+                postgresql_concurrently=True, if_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for _, table_name, _, old_index_name in LIST_INDEXES:
+            op.create_index(
+                old_index_name, table_name, ['family_id'],
+                unique=False, postgresql_concurrently=True, if_not_exists=True
+            )
+        op.drop_index(
+            'ix_family_member_user_id_family_id', table_name='family_member',
+            postgresql_concurrently=True, if_exists=True
+        )
+        for index_name, table_name, _, _ in LIST_INDEXES:
+            op.drop_index(
+                index_name, table_name=table_name,
+                postgresql_concurrently=True, if_exists=True
+            )
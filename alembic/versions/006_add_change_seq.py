@@ -0,0 +1,61 @@
+"""add change sequence, tombstones and milestone.updated_at for delta sync
+
+Revision ID: 006_add_change_seq
+Revises: 005_add_list_indexes
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '006_add_change_seq'
+down_revision: Union[str, None] = '005_add_list_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNCED_TABLES = ['todo', 'note', 'milestone']
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('change_seq')))
+
+    op.add_column('milestone', sa.Column('updated_at', postgresql.TIMESTAMP(), nullable=True))
+    op.execute('UPDATE milestone SET updated_at = created_at')
+    op.alter_column('milestone', 'updated_at',
+               existing_type=postgresql.TIMESTAMP(),
+               nullable=False)
+
+    for table_name in SYNCED_TABLES:
+        op.add_column(table_name, sa.Column(
+            'change_seq', sa.BigInteger(),
+            server_default=sa.text("nextval('change_seq')"), nullable=False
+        ))
+        op.create_index(f'ix_{table_name}_family_id_change_seq', table_name,
+                        ['family_id', 'change_seq'], unique=False)
+
+    op.create_table('tombstone',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('family_id', sa.Integer(), nullable=False),
+    sa.Column('resource', sa.String(), nullable=False),
+    sa.Column('resource_id', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(),
+              server_default=sa.text("nextval('change_seq')"), nullable=False),
+    sa.Column('deleted_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.ForeignKeyConstraint(['family_id'], ['family.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstone_family_id_change_seq', 'tombstone',
+                    ['family_id', 'change_seq'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tombstone_family_id_change_seq', table_name='tombstone')
+    op.drop_table('tombstone')
+    for table_name in SYNCED_TABLES:
+        op.drop_index(f'ix_{table_name}_family_id_change_seq', table_name=table_name)
+        op.drop_column(table_name, 'change_seq')
+    op.drop_column('milestone', 'updated_at')
+    op.execute(sa.schema.DropSequence(sa.Sequence('change_seq')))
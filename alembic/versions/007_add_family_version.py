@@ -0,0 +1,30 @@
+"""add per-family resource version counters for conditional GET
+
+Revision ID: 007_add_family_version
+Revises: 006_add_change_seq
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '007_add_family_version'
+down_revision: Union[str, None] = '006_add_change_seq'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('family_version',
+    sa.Column('family_id', sa.Integer(), nullable=False),
+    sa.Column('resource', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['family_id'], ['family.id'], ),
+    sa.PrimaryKeyConstraint('family_id', 'resource')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('family_version')
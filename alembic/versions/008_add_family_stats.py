@@ -0,0 +1,42 @@
+"""add per-family todo/note counters
+
+Revision ID: 008_add_family_stats
+Revises: 007_add_family_version
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '008_add_family_stats'
+down_revision: Union[str, None] = '007_add_family_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('family_stats',
+    sa.Column('family_id', sa.Integer(), nullable=False),
+    sa.Column('resource', sa.String(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['family_id'], ['family.id'], ),
+    sa.PrimaryKeyConstraint('family_id', 'resource', 'category')
+    )
+    op.execute("""
+        INSERT INTO family_stats (family_id, resource, category, total, completed)
+        SELECT family_id, 'todo', COALESCE(category, ''), count(*), count(*) FILTER (WHERE is_completed)
+        FROM todo GROUP BY family_id, COALESCE(category, '')
+    """)
+    op.execute("""
+        INSERT INTO family_stats (family_id, resource, category, total, completed)
+        SELECT family_id, 'note', COALESCE(category, ''), count(*), 0
+        FROM note GROUP BY family_id, COALESCE(category, '')
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('family_stats')
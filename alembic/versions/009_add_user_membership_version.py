@@ -0,0 +1,24 @@
+"""add user.membership_version for membership claims in access tokens
+
+Revision ID: 009_add_user_membership_version
+Revises: 008_add_family_stats
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '009_add_user_membership_version'
+down_revision: Union[str, None] = '008_add_family_stats'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user', sa.Column('membership_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('user', 'membership_version')
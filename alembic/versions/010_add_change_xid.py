@@ -0,0 +1,39 @@
+"""add change_xid for a commit-safe delta sync watermark
+
+Revision ID: 010_add_change_xid
+Revises: 009_add_user_membership_version
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '010_add_change_xid'
+down_revision: Union[str, None] = '009_add_user_membership_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNCED_TABLES = ['todo', 'note', 'milestone', 'tombstone']
+
+
+def upgrade() -> None:
+    for table_name in SYNCED_TABLES:
+        # 已有记录的事务号记为 0，旧的纯序号游标按 (0, 序号) 继续同步
+        op.add_column(table_name, sa.Column(
+            'change_xid', sa.BigInteger(), server_default='0', nullable=False
+        ))
+        op.alter_column(table_name, 'change_xid',
+                        server_default=sa.text('(pg_current_xact_id()::text::bigint)'))
+        op.drop_index(f'ix_{table_name}_family_id_change_seq', table_name=table_name)
+        op.create_index(f'ix_{table_name}_family_id_change_xid_change_seq', table_name,
+                        ['family_id', 'change_xid', 'change_seq'], unique=False)
+
+
+def downgrade() -> None:
+    for table_name in SYNCED_TABLES:
+        op.drop_index(f'ix_{table_name}_family_id_change_xid_change_seq', table_name=table_name)
+        op.create_index(f'ix_{table_name}_family_id_change_seq', table_name,
+                        ['family_id', 'change_seq'], unique=False)
+        op.drop_column(table_name, 'change_xid')
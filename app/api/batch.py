@@ -0,0 +1,191 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, Generic, List, Literal, Optional, Sequence, Tuple, Type, TypeVar
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import Integer, cast, column, delete, func, insert, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel, select
+from app.api.deps import require_membership
+from app.api.writes import (
+    STATS_COLUMNS,
+    StatsDeltas,
+    apply_family_stats,
+    count_family_stats,
+    previous_stats_rows,
+    previous_stats_values,
+    record_family_changes,
+    returning_previous,
+    tracks_family_stats,
+)
+from app.models.change import Tombstone, change_values
+from app.models.user import User
+
+MAX_BATCH_OPERATIONS = 200
+
+ItemT = TypeVar("ItemT")
+
+
+class DeleteOperation(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+class BatchItemResult(BaseModel, Generic[ItemT]):
+    index: int
+    op: Literal["create", "update", "delete"]
+    status: int
+    id: Optional[int] = None
+    item: Optional[ItemT] = None
+    detail: Optional[str] = None
+
+
+class BatchResponse(BaseModel, Generic[ItemT]):
+    results: List[BatchItemResult[ItemT]]
+
+
+async def apply_family_batch(
+    session: AsyncSession,
+    model: Type[SQLModel],
+    family_id: int,
+    operations: Sequence[BaseModel],
+    current_user: User,
+    create_values: Callable[[Any], Dict[str, Any]],
+) -> Dict[str, Any]:
+    """在同一事务中批量执行一个家庭内的创建、更新、删除操作，返回逐项结果。
+
+    只做一次成员校验；创建合并为一条多行 INSERT ... RETURNING，更新合并为一条
+    UPDATE ... FROM (VALUES ...)，删除合并为一条 DELETE ... RETURNING。
+    更新和删除只作用于该家庭内的记录，不存在的 id 在对应结果中返回 404。
+
+    加锁顺序与单条写入一致：先按 id 顺序锁定要更新、删除的记录并完成所有记录写入，
+    再一次性累加 family_stats，最后递增一次 family_version。
+    """
+    table = model.__table__
+    await require_membership(session, current_user, family_id)
+
+    creates = [(index, op) for index, op in enumerate(operations) if op.op == "create"]
+    updates = [(index, op) for index, op in enumerate(operations) if op.op == "update"]
+    deletes = [(index, op) for index, op in enumerate(operations) if op.op == "delete"]
+
+    seen_ids = set()
+    for _, op in updates + deletes:
+        if op.id in seen_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Duplicate {model.__name__} id in batch: {op.id}"
+            )
+        seen_ids.add(op.id)
+
+    now = datetime.utcnow()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(operations)
+    track_stats = tracks_family_stats(table)
+    stats: StatsDeltas = {}
+    changes: List[Tuple[str, int]] = []
+
+    if seen_ids:
+        # 并发的批量操作以不同顺序引用同一组记录，先按 id 顺序统一加锁，避免互相等待而死锁
+        await session.execute(
+            select(table.c.id)
+            .where(table.c.id.in_(sorted(seen_ids)), table.c.family_id == family_id)
+            .order_by(table.c.id)
+            .with_for_update()
+        )
+
+    if creates:
+        rows = [
+            {"family_id": family_id, "creator_id": current_user.id, **create_values(op)}
+            for _, op in creates
+        ]
+        result = await session.execute(
+            insert(table).returning(*table.c, sort_by_parameter_order=True), rows
+        )
+        created = result.mappings().all()
+        if track_stats:
+            count_family_stats(created, 1, stats)
+        for (index, _), row in zip(creates, created):
+            results[index] = {
+                "index": index, "op": "create", "status": 201, "id": row["id"], "item": row
+            }
+        changes.extend(("created", row["id"]) for row in created)
+
+    if updates:
+        fields = [name for name in type(updates[0][1]).model_fields if name not in ("op", "id")]
+        source = values(
+            column("id", Integer), *[column(name, table.c[name].type) for name in fields],
+            name="batch_update"
+        ).data([(op.id, *[getattr(op, name) for name in fields]) for _, op in updates])
+        stmt = (
+            update(table)
+            .where(table.c.id == source.c.id, table.c.family_id == family_id)
+            .values({
+                # 未设置的字段在 VALUES 中是无类型的 NULL，需显式转换为列类型
+                **{
+                    name: func.coalesce(cast(source.c[name], table.c[name].type), table.c[name])
+                    for name in fields
+                },
+                "updated_at": now,
+                **change_values()
+            })
+            .returning(*table.c)
+        )
+        if track_stats:
+            previous = previous_stats_values(
+                table, [op.id for _, op in updates], table.c.family_id == family_id
+            )
+            stmt = stmt.where(table.c.id == previous.c.id).returning(*returning_previous(previous))
+        result = await session.execute(stmt)
+        updated = {row["id"]: row for row in result.mappings()}
+        if track_stats:
+            count_family_stats(previous_stats_rows(updated.values()), -1, stats)
+            count_family_stats(updated.values(), 1, stats)
+        for index, op in updates:
+            row = updated.get(op.id)
+            results[index] = (
+                {"index": index, "op": "update", "status": 200, "id": op.id, "item": row}
+                if row is not None else _missing(index, "update", op.id, model)
+            )
+        changes.extend(("updated", resource_id) for resource_id in updated)
+
+    if deletes:
+        result = await session.execute(
+            delete(table)
+            .where(table.c.id.in_([op.id for _, op in deletes]), table.c.family_id == family_id)
+            .returning(table.c.id, *[table.c[name] for name in STATS_COLUMNS if name in table.c])
+        )
+        removed = result.mappings().all()
+        deleted = {row["id"] for row in removed}
+        if track_stats:
+            count_family_stats(removed, -1, stats)
+        for index, op in deletes:
+            results[index] = (
+                {"index": index, "op": "delete", "status": 200, "id": op.id}
+                if op.id in deleted else _missing(index, "delete", op.id, model)
+            )
+        if deleted:
+            await session.execute(insert(Tombstone.__table__), [
+                {
+                    "family_id": family_id,
+                    "resource": table.name,
+                    "resource_id": resource_id,
+                    "deleted_at": now
+                }
+                for resource_id in deleted
+            ])
+            changes.extend(("deleted", resource_id) for resource_id in deleted)
+
+    if stats:
+        await apply_family_stats(session, family_id, table.name, stats)
+    if changes:
+        await record_family_changes(session, family_id, table.name, changes)
+
+    return {"results": results}
+
+
+def _missing(index: int, op: str, resource_id: int, model: Type[SQLModel]) -> Dict[str, Any]:
+    return {
+        "index": index,
+        "op": op,
+        "status": 404,
+        "id": resource_id,
+        "detail": f"{model.__name__} not found"
+    }
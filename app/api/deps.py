@@ -1,15 +1,101 @@
-from typing import Annotated
+import json
+import logging
+from contextvars import ContextVar
+from typing import Annotated, Dict, NamedTuple, Optional, Tuple, Type, TypeVar
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+from sqlalchemy import and_, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlmodel import SQLModel, select
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.db.session import get_session
+from app.core.metrics import (
+    MEMBERSHIP_CACHE_INVALIDATIONS,
+    MEMBERSHIP_CACHE_REQUESTS,
+    PRINCIPAL_CACHE_REQUESTS,
+)
+from app.core.security import (
+    InvalidTokenError,
+    access_token_digest,
+    decode_access_token,
+    parse_membership_claims,
+)
+from app.db.session import async_session_factory, engine, get_session
+from app.models.family import Family, FamilyMember
 from app.models.user import User
 
+logger = logging.getLogger(__name__)
+
+ResourceT = TypeVar("ResourceT", bound=SQLModel)
+
+MEMBERSHIP_CHANNEL = "family_membership"
+
 security = HTTPBearer()
 
+principal_cache: TTLCache[tuple, User] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+class Membership(NamedTuple):
+    family_exists: bool
+    role: Optional[str] = None
+
+    @property
+    def is_member(self) -> bool:
+        return self.role is not None
+
+
+membership_cache: TTLCache[tuple, Membership] = TTLCache(
+    maxsize=settings.MEMBERSHIP_CACHE_MAX_SIZE,
+    ttl=settings.MEMBERSHIP_CACHE_TTL_SECONDS,
+)
+
+# 当前请求的访问令牌中仍然有效的成员关系声明：(user_id, {family_id: role})
+token_memberships: ContextVar[Optional[Tuple[int, Dict[int, str]]]] = ContextVar(
+    "token_memberships", default=None
+)
+
+
+def invalidate_principal(user_id: int) -> None:
+    principal_cache.discard_where(lambda key: key[0] == user_id)
+
+
+def clear_principal_cache() -> None:
+    principal_cache.clear()
+
+
+def invalidate_membership(payload: str) -> None:
+    """处理其他 worker（或本进程）发出的成员变更通知。"""
+    try:
+        data = json.loads(payload)
+        key = (int(data["user_id"]), int(data["family_id"]))
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Ignoring malformed membership notification: %r", payload)
+        return
+    if membership_cache.pop(key) is not None:
+        MEMBERSHIP_CACHE_INVALIDATIONS.inc()
+    # 缓存的 User 带着 membership_version，丢弃后令牌声明的版本校验立即生效
+    invalidate_principal(key[0])
+
+
+def clear_membership_cache() -> None:
+    membership_cache.clear()
+
+
+async def record_membership_change(session: AsyncSession, user_id: int, family_id: int) -> None:
+    """在当前事务中递增用户的成员关系版本并发送成员变更通知，提交后所有 worker 都会丢弃对应的缓存条目。"""
+    await session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(membership_version=User.membership_version + 1)
+    )
+    membership_cache.pop((user_id, family_id))
+    invalidate_principal(user_id)
+    payload = json.dumps({"user_id": user_id, "family_id": family_id})
+    await session.execute(select(func.pg_notify(MEMBERSHIP_CHANNEL, payload)))
+
 
 async def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
@@ -20,17 +106,163 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    token = credentials.credentials
+    # 两个缓存共用同一个令牌摘要，每个请求只计算一次
+    digest = None
+    if settings.ACCESS_TOKEN_CACHE_ENABLED or settings.PRINCIPAL_CACHE_ENABLED:
+        digest = access_token_digest(token)
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_access_token(token, digest)
         user_id: int = int(payload.get("sub"))
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+    except InvalidTokenError:
         raise credentials_exception
-    
-    result = await session.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+
+    cache_key = None
+    user = None
+    if settings.PRINCIPAL_CACHE_ENABLED:
+        cache_key = (user_id, digest)
+        user = principal_cache.get(cache_key)
+        if user is not None:
+            PRINCIPAL_CACHE_REQUESTS.labels("hit").inc()
+        else:
+            PRINCIPAL_CACHE_REQUESTS.labels("miss").inc()
+
     if user is None:
-        raise credentials_exception
+        result = await session.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise credentials_exception
+        if cache_key is not None:
+            principal_cache.set(cache_key, user)
+
+    memberships = None
+    if settings.MEMBERSHIP_CLAIMS_ENABLED:
+        memberships = parse_membership_claims(payload, user.membership_version)
+    token_memberships.set((user.id, memberships) if memberships is not None else None)
     return user
+
+
+def cached_membership(user_id: int, family_id: int) -> Optional[Membership]:
+    """从访问令牌声明或成员关系缓存中取成员关系，两者都没有时返回 None，不查询数据库。"""
+    claims = token_memberships.get()
+    if claims is not None and claims[0] == user_id and family_id in claims[1]:
+        MEMBERSHIP_CACHE_REQUESTS.labels("token").inc()
+        return Membership(family_exists=True, role=claims[1][family_id])
+
+    if settings.MEMBERSHIP_CACHE_ENABLED:
+        membership = membership_cache.get((user_id, family_id))
+        if membership is not None:
+            MEMBERSHIP_CACHE_REQUESTS.labels("hit").inc()
+            return membership
+        MEMBERSHIP_CACHE_REQUESTS.labels("miss").inc()
+    return None
+
+
+def _remember_membership(user_id: int, family_id: int, membership: Membership) -> None:
+    # 不存在的家庭不缓存：家庭创建时只会通知创建者自己的缓存条目
+    if settings.MEMBERSHIP_CACHE_ENABLED and membership.family_exists:
+        membership_cache.set((user_id, family_id), membership)
+
+
+async def get_membership(session: AsyncSession, user_id: int, family_id: int) -> Membership:
+    membership = cached_membership(user_id, family_id)
+    if membership is not None:
+        return membership
+
+    if session.bind is engine:
+        membership = await _load_membership(session, user_id, family_id)
+    else:
+        # 副本可能还没有同步刚提交的成员变更，缓存的结果必须从主库读取
+        async with async_session_factory() as primary_session:
+            membership = await _load_membership(primary_session, user_id, family_id)
+    _remember_membership(user_id, family_id, membership)
+    return membership
+
+
+async def _load_membership(session: AsyncSession, user_id: int, family_id: int) -> Membership:
+    result = await session.execute(
+        select(Family.id, FamilyMember.role)
+        .outerjoin(
+            FamilyMember,
+            and_(
+                FamilyMember.family_id == Family.id,
+                FamilyMember.user_id == user_id,
+            ),
+        )
+        .where(Family.id == family_id)
+    )
+    row = result.first()
+    return Membership(family_exists=row is not None, role=row.role if row else None)
+
+
+async def require_membership(
+    session: AsyncSession,
+    current_user: User,
+    family_id: int,
+) -> Membership:
+    membership = await get_membership(session, current_user.id, family_id)
+    if not membership.family_exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Family not found"
+        )
+    if not membership.is_member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a member of this family"
+        )
+    return membership
+
+
+async def require_family_member(
+    family_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)]
+) -> Membership:
+    """所有按家庭访问的路由共用的授权依赖，family_id 取自路径参数或查询参数。"""
+    return await require_membership(session, current_user, family_id)
+
+
+async def get_family_resource(
+    session: AsyncSession,
+    model: Type[ResourceT],
+    resource_id: int,
+    current_user: User,
+) -> ResourceT:
+    result = await session.execute(
+        select(model, FamilyMember.role)
+        .outerjoin(
+            FamilyMember,
+            and_(
+                FamilyMember.family_id == model.family_id,
+                FamilyMember.user_id == current_user.id,
+            ),
+        )
+        .where(model.id == resource_id)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{model.__name__} not found"
+        )
+    
+    resource, role = row
+    membership = cached_membership(current_user.id, resource.family_id)
+    if membership is None:
+        if session.bind is engine:
+            membership = Membership(family_exists=True, role=role)
+            _remember_membership(current_user.id, resource.family_id, membership)
+        elif role is not None:
+            membership = Membership(family_exists=True, role=role)
+        else:
+            # 副本上查不到成员行可能只是复制延迟，以主库为准
+            membership = await get_membership(session, current_user.id, resource.family_id)
+    if not membership.is_member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a member of this family"
+        )
+    return resource
@@ -0,0 +1,51 @@
+import hashlib
+from fastapi import Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+from app.models.change import FamilyVersion
+
+
+async def get_family_list_etag(
+    request: Request,
+    session: AsyncSession,
+    family_id: int,
+    resource: str,
+) -> str:
+    """调用方需先通过 require_family_member 完成授权。"""
+    version = await session.scalar(
+        select(FamilyVersion.version).where(
+            FamilyVersion.family_id == family_id,
+            FamilyVersion.resource == resource
+        )
+    )
+
+    variant = hashlib.sha1(
+        repr(sorted(request.query_params.multi_items())).encode()
+    ).hexdigest()[:16]
+    return f'W/"{resource}-{family_id}-{version or 0}-{variant}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque_tag(etag) in {_opaque_tag(tag) for tag in header.split(",")}
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
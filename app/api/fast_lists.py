@@ -0,0 +1,86 @@
+import time
+from functools import lru_cache
+from typing import Any, Collection, Dict, Optional, Tuple, Type
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+from app.api.etag import set_etag
+from app.api.pagination import PageParams, decode_cursor, encode_cursor
+from app.db.instrumentation import record_query
+
+
+@lru_cache(maxsize=64)
+def _list_sql(
+    table: str,
+    columns: Tuple[str, ...],
+    sort_column: str,
+    filters: Tuple[str, ...],
+    with_cursor: bool,
+    with_limit: bool,
+) -> str:
+    conditions = ["family_id = $1"]
+    conditions += [f"{name} = ${index}" for index, name in enumerate(filters, start=2)]
+    next_param = len(filters) + 2
+    if with_cursor:
+        conditions.append(f"({sort_column}, id) < (${next_param}, ${next_param + 1})")
+        next_param += 2
+    sql = (
+        f"SELECT {', '.join(columns)} FROM {table} "
+        f"WHERE {' AND '.join(conditions)} "
+        f"ORDER BY {sort_column} DESC, id DESC"
+    )
+    if with_limit:
+        sql += f" LIMIT ${next_param}"
+    return sql
+
+
+async def fetch_list_json(
+    session: AsyncSession,
+    model: Type[SQLModel],
+    response_model: Type[BaseModel],
+    sort_attr: str,
+    family_id: int,
+    page: PageParams,
+    filters: Optional[Dict[str, Any]] = None,
+    exclude: Collection[str] = (),
+) -> bytes:
+    """绕过 ORM 直接用 asyncpg 预编译语句读取列表，并序列化为与 response_model 相同格式的 JSON。"""
+    filters = {name: value for name, value in (filters or {}).items() if value is not None}
+    columns = tuple(name for name in response_model.model_fields if name not in exclude)
+    params = [family_id, *filters.values()]
+    if page.enabled and page.cursor is not None:
+        params += decode_cursor(page.cursor, getattr(model, sort_attr))
+    if page.enabled:
+        params.append(page.limit + 1)
+    sql = _list_sql(
+        model.__tablename__,
+        columns,
+        sort_attr,
+        tuple(filters),
+        page.enabled and page.cursor is not None,
+        page.enabled,
+    )
+
+    # 复用 session 当前的连接（与 ETag 查询同一事务、同一主库或副本）
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    started_at = time.perf_counter()
+    records = await raw_connection.driver_connection.fetch(sql, *params)
+    record_query(sql, time.perf_counter() - started_at)
+
+    if not page.enabled:
+        return orjson.dumps([dict(record) for record in records])
+    next_cursor = None
+    if len(records) > page.limit:
+        records = records[:page.limit]
+        last = records[-1]
+        next_cursor = encode_cursor(last[sort_attr], last["id"])
+    return orjson.dumps({"items": [dict(record) for record in records], "next_cursor": next_cursor})
+
+
+def fast_list_response(content: bytes, etag: str) -> Response:
+    response = Response(content=content, media_type="application/json")
+    set_etag(response, etag)
+    return response
@@ -0,0 +1,79 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, Generic, List, Optional, TypeVar, Union
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(BaseModel, Generic[ItemT]):
+    items: List[ItemT]
+    next_cursor: Optional[str] = None
+
+
+class PageParams:
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None),
+    ):
+        self.enabled = limit is not None or cursor is not None
+        self.limit = limit or DEFAULT_PAGE_SIZE
+        self.cursor = cursor
+
+
+def encode_cursor(sort_value: Any, item_id: int) -> str:
+    raw = json.dumps([sort_value.isoformat(), item_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_column: ColumnElement) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, item_id = json.loads(raw)
+        return sort_column.type.python_type.fromisoformat(sort_value), int(item_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset_paginate(
+    query: Select,
+    sort_column: ColumnElement,
+    id_column: ColumnElement,
+    page: PageParams,
+) -> Select:
+    query = query.order_by(sort_column.desc(), id_column.desc())
+    if not page.enabled:
+        return query
+    if page.cursor is not None:
+        query = query.where(
+            tuple_(sort_column, id_column) < tuple_(*decode_cursor(page.cursor, sort_column))
+        )
+    return query.limit(page.limit + 1)
+
+
+def paginated_response(
+    items: List[ItemT],
+    page: PageParams,
+    sort_attr: str,
+) -> Union[List[ItemT], Dict[str, Any]]:
+    """返回原始对象，由端点的 response_model（List 或 Page）统一校验序列化。"""
+    if not page.enabled:
+        return items
+    next_cursor = None
+    if len(items) > page.limit:
+        items = items[:page.limit]
+        last = items[-1]
+        next_cursor = encode_cursor(last[sort_attr], last["id"])
+    return {"items": items, "next_cursor": next_cursor}
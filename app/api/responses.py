@@ -0,0 +1,29 @@
+from typing import Any, Collection, List, Literal, Type
+from pydantic import BaseModel, ConfigDict
+from sqlmodel import SQLModel
+
+ListView = Literal["detail", "summary"]
+
+
+class ResponseModel(BaseModel):
+    """响应模型基类。
+
+    端点直接返回 ORM 对象、查询结果行或字典，由 FastAPI 按 response_model
+    校验一次并直接序列化为 JSON，不再在端点中手工构造响应模型。
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+def response_columns(
+    model: Type[SQLModel],
+    response_model: Type[BaseModel],
+    exclude: Collection[str] = (),
+) -> List[Any]:
+    """列表查询只选取响应模型需要的列，配合 result.mappings() 跳过 ORM 对象构造。
+
+    exclude 中的字段不查询，配合 response_model_exclude_unset 从响应中省略。
+    """
+    return [
+        getattr(model, name) for name in response_model.model_fields if name not in exclude
+    ]
@@ -0,0 +1,41 @@
+from typing import AsyncIterator, Literal, Type
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from app.api.etag import set_etag
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_BATCH_SIZE = 500
+
+ListFormat = Literal["json", "ndjson"]
+
+
+def ndjson_response(
+    session: AsyncSession,
+    query: Select,
+    response_model: Type[BaseModel],
+    etag: str,
+) -> StreamingResponse:
+    """用服务端游标分批读取查询结果，逐行输出 NDJSON，内存占用与结果集大小无关。
+
+    响应体在端点返回后才开始迭代，请求的 session 届时可能已关闭，
+    因此在生成器内基于同一个数据库（主库或副本）打开独立的 session。
+    """
+    bind = session.bind
+    adapter = TypeAdapter(response_model)
+
+    async def lines() -> AsyncIterator[bytes]:
+        async with AsyncSession(bind) as stream_session:
+            result = await stream_session.stream(
+                query, execution_options={"yield_per": NDJSON_BATCH_SIZE}
+            )
+            async for rows in result.mappings().partitions():
+                yield b"".join(
+                    adapter.dump_json(adapter.validate_python(row), exclude_unset=True) + b"\n"
+                    for row in rows
+                )
+
+    response = StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+    set_etag(response, etag)
+    return response
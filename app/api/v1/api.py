@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, family, milestone, todo, note
+from app.api.v1.endpoints import auth, family, milestone, todo, note, sync
 
 api_router = APIRouter()
 
@@ -8,3 +8,4 @@ api_router.include_router(family.router, prefix="/family", tags=["family"])
 api_router.include_router(milestone.router, prefix="/milestone", tags=["milestone"])
 api_router.include_router(todo.router, prefix="/todo", tags=["todo"])
 api_router.include_router(note.router, prefix="/note", tags=["note"])
+api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
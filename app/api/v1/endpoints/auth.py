@@ -1,10 +1,20 @@
-from typing import Annotated
+from typing import Annotated, Any, Dict
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
-from app.core.security import create_access_token, get_password_hash, verify_password
-from app.db.session import get_session
+from app.core.config import settings
+from app.core.security import (
+    PasswordHashQueueFullError,
+    create_access_token,
+    get_password_hash_async,
+    membership_claims,
+    verify_password_async,
+)
+from app.api.deps import get_current_user
+from app.api.responses import ResponseModel
+from app.db.session import get_read_session, get_session
+from app.models.family import FamilyMember
 from app.models.user import User
 
 router = APIRouter()
@@ -24,7 +34,7 @@ class LoginRequest(BaseModel):
     password: str
 
 
-class UserInfo(BaseModel):
+class UserInfo(ResponseModel):
     id: int
     phone: str
     username: str
@@ -33,24 +43,54 @@ class UserInfo(BaseModel):
     private_key_salt: str
 
 
-class LoginResponse(BaseModel):
+class LoginResponse(ResponseModel):
     access_token: str
     token_type: str = "bearer"
     user_info: UserInfo
 
 
-class PublicKeyResponse(BaseModel):
+class TokenResponse(ResponseModel):
+    access_token: str
+    token_type: str = "bearer"
+
+
+class PublicKeyResponse(ResponseModel):
     public_key: str
 
 
-class UsernameResponse(BaseModel):
+class UsernameResponse(ResponseModel):
     username: str
 
 
+async def _token_claims(session: AsyncSession, user_id: int) -> Dict[str, Any]:
+    claims: Dict[str, Any] = {"sub": str(user_id)}
+    if not settings.MEMBERSHIP_CLAIMS_ENABLED:
+        return claims
+    # 先读版本再读成员关系：两次读取之间发生的变更只会让令牌中的版本偏旧，声明被忽略
+    version = await session.scalar(select(User.membership_version).where(User.id == user_id))
+    result = await session.execute(
+        select(FamilyMember.family_id, FamilyMember.role)
+        .where(FamilyMember.user_id == user_id)
+        .limit(settings.MEMBERSHIP_CLAIMS_MAX_FAMILIES + 1)
+    )
+    memberships = dict(result.all())
+    if len(memberships) <= settings.MEMBERSHIP_CLAIMS_MAX_FAMILIES:
+        claims.update(membership_claims(memberships, version))
+    return claims
+
+
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry later",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.get("/public-key", response_model=PublicKeyResponse)
 async def get_public_key(
     phone: str,
-    session: Annotated[AsyncSession, Depends(get_session)]
+    session: Annotated[AsyncSession, Depends(get_read_session)]
 ):
     result = await session.execute(select(User).where(User.phone == phone))
     user = result.scalar_one_or_none()
@@ -61,13 +101,13 @@ async def get_public_key(
             detail="User not found"
         )
     
-    return PublicKeyResponse(public_key=user.public_key)
+    return user
 
 
 @router.get("/username", response_model=UsernameResponse)
 async def get_username(
     user_id: int,
-    session: Annotated[AsyncSession, Depends(get_session)]
+    session: Annotated[AsyncSession, Depends(get_read_session)]
 ):
     result = await session.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
@@ -78,7 +118,7 @@ async def get_username(
             detail="User not found"
         )
     
-    return UsernameResponse(username=user.username)
+    return user
 
 
 @router.post("/register", response_model=UserInfo)
@@ -94,10 +134,15 @@ async def register(
             detail="Phone number already registered"
         )
     
+    try:
+        hashed_password = await get_password_hash_async(request.password)
+    except PasswordHashQueueFullError:
+        raise _hashing_busy()
+    
     user = User(
         phone=request.phone,
         username=request.username,
-        hashed_password=get_password_hash(request.password),
+        hashed_password=hashed_password,
         public_key=request.public_key,
         encrypted_private_key=request.encrypted_private_key,
         private_key_salt=request.private_key_salt
@@ -106,14 +151,7 @@ async def register(
     await session.commit()
     await session.refresh(user)
     
-    return UserInfo(
-        id=user.id,
-        phone=user.phone,
-        username=user.username,
-        public_key=user.public_key,
-        encrypted_private_key=user.encrypted_private_key,
-        private_key_salt=user.private_key_salt
-    )
+    return user
 
 
 @router.post("/login", response_model=LoginResponse)
@@ -124,22 +162,27 @@ async def login(
     result = await session.execute(select(User).where(User.phone == request.phone))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(request.password, user.hashed_password):
+    try:
+        password_ok = user is not None and await verify_password_async(
+            request.password, user.hashed_password
+        )
+    except PasswordHashQueueFullError:
+        raise _hashing_busy()
+    
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect phone or password"
         )
     
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_access_token(data=await _token_claims(session, user.id))
     
-    return LoginResponse(
-        access_token=access_token,
-        user_info=UserInfo(
-            id=user.id,
-            phone=user.phone,
-            username=user.username,
-            public_key=user.public_key,
-            encrypted_private_key=user.encrypted_private_key,
-            private_key_salt=user.private_key_salt
-        )
-    )
+    return {"access_token": access_token, "user_info": user}
+
+
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh_token(
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)]
+):
+    return {"access_token": create_access_token(data=await _token_claims(session, current_user.id))}
@@ -1,15 +1,36 @@
-from typing import Annotated, List, Literal
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from typing import Annotated, Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from sqlmodel import select
-from app.api.deps import get_current_user
-from app.db.session import get_session
+from app.api.deps import (
+    get_current_user,
+    record_membership_change,
+    require_family_member,
+    require_membership,
+)
+from app.api.pagination import MAX_PAGE_SIZE
+from app.api.responses import ResponseModel, response_columns
+from app.api.v1.endpoints.milestone import MilestoneResponse
+from app.api.v1.endpoints.note import NoteResponse
+from app.api.v1.endpoints.todo import TodoResponse
+from app.core.config import settings
+from app.core.events import family_events
+from app.db.session import get_read_session, get_session
 from app.models.user import User
+from app.models.change import FamilyStats
 from app.models.family import Family, FamilyMember
+from app.models.milestone import Milestone
+from app.models.note import Note
+from app.models.todo import Todo
 
 router = APIRouter()
 
+OVERVIEW_RECENT_LIMIT = 10
+
 
 class CreateFamilyRequest(BaseModel):
     name: str
@@ -17,7 +38,7 @@ class CreateFamilyRequest(BaseModel):
     role: Literal["男主人", "女主人"] = "男主人"
 
 
-class FamilyResponse(BaseModel):
+class FamilyResponse(ResponseModel):
     id: int
     name: str
     owner_id: int
@@ -30,7 +51,7 @@ class AddMemberRequest(BaseModel):
     role: Literal["男主人", "女主人", "儿子", "女儿", "爸爸", "妈妈", "岳父", "岳母"] = "儿子"
 
 
-class FamilyWithKeyResponse(BaseModel):
+class FamilyWithKeyResponse(ResponseModel):
     id: int
     name: str
     owner_id: int
@@ -38,11 +59,39 @@ class FamilyWithKeyResponse(BaseModel):
     encrypted_family_key: str
 
 
-class FamilyMemberResponse(BaseModel):
+class FamilyMemberResponse(ResponseModel):
     user_id: int
     phone: str
     username: str
     role: str
+    public_key: Optional[str] = None
+
+
+class TodoCounts(ResponseModel):
+    total: int
+    completed: int
+    by_category: Dict[str, int]
+
+
+class NoteCounts(ResponseModel):
+    total: int
+    by_category: Dict[str, int]
+
+
+class FamilyStatsResponse(ResponseModel):
+    todo: TodoCounts
+    note: NoteCounts
+
+
+class FamilyOverviewResponse(ResponseModel):
+    family: FamilyWithKeyResponse
+    members: List[FamilyMemberResponse]
+    todos: List[TodoResponse]
+    notes: List[NoteResponse]
+    milestones: List[MilestoneResponse]
+    todo_counts: TodoCounts
+    note_counts: NoteCounts
+    milestone_count: int
 
 
 @router.post("/", response_model=FamilyResponse)
@@ -66,13 +115,10 @@ async def create_family(
         encrypted_family_key=request.encrypted_family_key
     )
     session.add(family_member)
+    await record_membership_change(session, current_user.id, family.id)
     await session.commit()
     
-    return FamilyResponse(
-        id=family.id,
-        name=family.name,
-        owner_id=family.owner_id
-    )
+    return family
 
 
 @router.post("/member")
@@ -127,6 +173,7 @@ async def add_member(
         encrypted_family_key=request.encrypted_key_for_target
     )
     session.add(family_member)
+    await record_membership_change(session, target_user.id, request.family_id)
     await session.commit()
     
     return {"message": "Member added successfully"}
@@ -135,64 +182,220 @@ async def add_member(
 @router.get("/my", response_model=List[FamilyWithKeyResponse])
 async def get_my_families(
     current_user: Annotated[User, Depends(get_current_user)],
-    session: Annotated[AsyncSession, Depends(get_session)]
+    session: Annotated[AsyncSession, Depends(get_read_session)]
 ):
     result = await session.execute(
-        select(FamilyMember, Family).join(Family).where(
+        select(
+            Family.id,
+            Family.name,
+            Family.owner_id,
+            FamilyMember.role,
+            FamilyMember.encrypted_family_key
+        ).join(Family).where(
             FamilyMember.user_id == current_user.id
         )
     )
-    rows = result.all()
-    
-    families = []
-    for family_member, family in rows:
-        families.append(FamilyWithKeyResponse(
-            id=family.id,
-            name=family.name,
-            owner_id=family.owner_id,
-            role=family_member.role,
-            encrypted_family_key=family_member.encrypted_family_key
-        ))
-    
-    return families
+    return result.all()
 
 
-@router.get("/{family_id}/members", response_model=List[FamilyMemberResponse])
+@router.get(
+    "/{family_id}/members",
+    response_model=List[FamilyMemberResponse],
+    response_model_exclude_none=True,
+    dependencies=[Depends(require_family_member)]
+)
 async def get_family_members(
     family_id: int,
-    current_user: Annotated[User, Depends(get_current_user)],
-    session: Annotated[AsyncSession, Depends(get_session)]
+    include_public_key: bool = False,
+    *,
+    session: Annotated[AsyncSession, Depends(get_read_session)]
 ):
+    columns = [User.id.label("user_id"), User.phone, User.username, FamilyMember.role]
+    if include_public_key:
+        columns.append(User.public_key)
+    
     result = await session.execute(
-        select(FamilyMember).where(FamilyMember.family_id == family_id)
+        select(*columns)
+        .join(User, User.id == FamilyMember.user_id)
+        .where(FamilyMember.family_id == family_id)
+        .order_by(FamilyMember.user_id)
     )
-    family_members = result.scalars().all()
-    
-    if not family_members:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Family not found"
+    return result.all()
+
+
+@router.get(
+    "/{family_id}/overview",
+    response_model=FamilyOverviewResponse,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(require_family_member)]
+)
+async def get_family_overview(
+    family_id: int,
+    limit: int = Query(OVERVIEW_RECENT_LIMIT, ge=1, le=MAX_PAGE_SIZE),
+    *,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_read_session)]
+):
+    result = await session.execute(
+        select(
+            Family.id,
+            Family.name,
+            Family.owner_id,
+            FamilyMember.role,
+            FamilyMember.encrypted_family_key
+        ).join(Family).where(
+            FamilyMember.family_id == family_id,
+            FamilyMember.user_id == current_user.id
         )
-    
-    is_member = any(fm.user_id == current_user.id for fm in family_members)
-    if not is_member:
+    )
+    family = result.first()
+    if family is None:
+        # 成员关系已在主库确认，副本尚未同步到该成员行
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not a member of this family"
         )
     
-    members = []
-    for family_member in family_members:
-        result = await session.execute(
-            select(User).where(User.id == family_member.user_id)
+    # 成员列表和计数器沿用当前 session，其余子查询各自占用一个连接池连接并发执行，
+    # 与当前 session 读取同一个数据库（主库或副本）
+    (members, counts), todos, notes, (milestones, milestone_count) = await asyncio.gather(
+        _overview_members(session, family_id),
+        _on_own_session(session.bind, _overview_todos, family_id, limit),
+        _on_own_session(session.bind, _overview_notes, family_id, limit),
+        _on_own_session(session.bind, _overview_milestones, family_id, limit),
+    )
+    return {
+        "family": family,
+        "members": members,
+        "todos": todos,
+        "notes": notes,
+        "milestones": milestones,
+        "todo_counts": counts["todo"],
+        "note_counts": counts["note"],
+        "milestone_count": milestone_count
+    }
+
+
+async def _on_own_session(
+    bind: AsyncEngine,
+    query: Callable[..., Awaitable[Any]],
+    *args: Any,
+) -> Any:
+    async with AsyncSession(bind) as session:
+        return await query(session, *args)
+
+
+async def _overview_members(session: AsyncSession, family_id: int) -> tuple:
+    result = await session.execute(
+        select(User.id.label("user_id"), User.phone, User.username, FamilyMember.role)
+        .join(User, User.id == FamilyMember.user_id)
+        .where(FamilyMember.family_id == family_id)
+        .order_by(FamilyMember.user_id)
+    )
+    members = result.all()
+    result = await session.execute(
+        select(FamilyStats.resource, FamilyStats.category, FamilyStats.total, FamilyStats.completed)
+        .where(FamilyStats.family_id == family_id)
+    )
+    return members, _stats_counts(result.all())
+
+
+async def _overview_todos(session: AsyncSession, family_id: int, limit: int) -> List[Any]:
+    result = await session.execute(
+        select(*response_columns(Todo, TodoResponse))
+        .where(Todo.family_id == family_id)
+        .order_by(Todo.created_at.desc(), Todo.id.desc())
+        .limit(limit)
+    )
+    return result.mappings().all()
+
+
+async def _overview_notes(session: AsyncSession, family_id: int, limit: int) -> List[Any]:
+    result = await session.execute(
+        select(*response_columns(Note, NoteResponse))
+        .where(Note.family_id == family_id)
+        .order_by(Note.created_at.desc(), Note.id.desc())
+        .limit(limit)
+    )
+    return result.mappings().all()
+
+
+async def _overview_milestones(session: AsyncSession, family_id: int, limit: int) -> tuple:
+    result = await session.execute(
+        select(*response_columns(Milestone, MilestoneResponse))
+        .where(Milestone.family_id == family_id)
+        .order_by(Milestone.event_date.desc(), Milestone.id.desc())
+        .limit(limit)
+    )
+    milestones = result.mappings().all()
+    count = await session.scalar(
+        select(func.count()).select_from(Milestone).where(Milestone.family_id == family_id)
+    )
+    return milestones, count
+
+
+@router.get(
+    "/{family_id}/stats",
+    response_model=FamilyStatsResponse,
+    dependencies=[Depends(require_family_member)]
+)
+async def get_family_stats(
+    family_id: int,
+    session: Annotated[AsyncSession, Depends(get_read_session)]
+):
+    result = await session.execute(
+        select(FamilyStats.resource, FamilyStats.category, FamilyStats.total, FamilyStats.completed)
+        .where(FamilyStats.family_id == family_id)
+    )
+    return _stats_counts(result.all())
+
+
+def _stats_counts(rows: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+    """把 family_stats 的 (resource, category) 计数器汇总为总数、完成数和分类计数。"""
+    counts = {
+        "todo": {"total": 0, "completed": 0, "by_category": {}},
+        "note": {"total": 0, "by_category": {}},
+    }
+    for resource, category, total, completed in rows:
+        resource_counts = counts[resource]
+        resource_counts["total"] += total
+        if "completed" in resource_counts:
+            resource_counts["completed"] += completed
+        if category and total:
+            resource_counts["by_category"][category] = total
+    return counts
+
+
+@router.get("/{family_id}/events")
+async def get_family_events(
+    family_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)]
+):
+    if not settings.FAMILY_EVENTS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Family events are disabled"
         )
-        user = result.scalar_one_or_none()
-        if user:
-            members.append(FamilyMemberResponse(
-                user_id=user.id,
-                phone=user.phone,
-                username=user.username,
-                role=family_member.role
-            ))
     
-    return members
+    await require_membership(session, current_user, family_id)
+    # Give the pooled connection back before the stream starts idling.
+    await session.close()
+    
+    async def event_stream() -> AsyncIterator[str]:
+        queue = family_events.subscribe(family_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                yield message
+        finally:
+            family_events.unsubscribe(family_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
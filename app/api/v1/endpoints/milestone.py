@@ -1,13 +1,20 @@
-from typing import Annotated, List, Optional
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
 from datetime import date, datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Query, Request, Response
+from pydantic import BaseModel, Field
+from sqlalchemy import Integer, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 from sqlmodel import select
-from app.api.deps import get_current_user
-from app.db.session import get_session
+from app.api.batch import MAX_BATCH_OPERATIONS, BatchResponse, apply_family_batch
+from app.api.deps import get_current_user, require_family_member
+from app.api.etag import get_family_list_etag, is_not_modified, not_modified_response, set_etag
+from app.api.pagination import Page, PageParams, keyset_paginate, paginated_response
+from app.api.responses import ResponseModel, response_columns
+from app.api.streaming import ListFormat, ndjson_response
+from app.api.writes import insert_family_resource, update_family_resource
+from app.db.session import get_read_session, get_session
 from app.models.user import User
-from app.models.family import FamilyMember
 from app.models.milestone import Milestone
 
 router = APIRouter()
@@ -24,13 +31,40 @@ class UpdateMilestoneRequest(BaseModel):
     content_ciphertext: Optional[str] = None
 
 
-class MilestoneResponse(BaseModel):
+class TimelineBucket(ResponseModel):
+    year: int
+    month: int
+    count: int
+
+
+class CreateMilestoneOperation(BaseModel):
+    op: Literal["create"]
+    event_date: date
+    content_ciphertext: str
+
+
+class UpdateMilestoneOperation(UpdateMilestoneRequest):
+    op: Literal["update"]
+    id: int
+
+
+class BatchMilestoneRequest(BaseModel):
+    family_id: int
+    # 里程碑不支持删除，批量操作同样只包含创建和更新
+    operations: List[Annotated[
+        Union[CreateMilestoneOperation, UpdateMilestoneOperation],
+        Field(discriminator="op")
+    ]] = Field(..., min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+
+class MilestoneResponse(ResponseModel):
     id: int
     family_id: int
     creator_id: int
     event_date: date
     content_ciphertext: str
     created_at: datetime
+    updated_at: datetime
 
 
 @router.post("/", response_model=MilestoneResponse)
@@ -39,84 +73,126 @@ async def create_milestone(
     current_user: Annotated[User, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
-    result = await session.execute(
-        select(FamilyMember).where(
-            FamilyMember.family_id == request.family_id,
-            FamilyMember.user_id == current_user.id
-        )
-    )
-    member = result.scalar_one_or_none()
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this family"
-        )
+    row = await insert_family_resource(session, Milestone, {
+        "family_id": request.family_id,
+        "creator_id": current_user.id,
+        "event_date": request.event_date,
+        "content_ciphertext": request.content_ciphertext
+    }, current_user)
+    await session.commit()
     
-    milestone = Milestone(
-        family_id=request.family_id,
-        creator_id=current_user.id,
-        event_date=request.event_date,
-        content_ciphertext=request.content_ciphertext
+    return row
+
+
+@router.post("/batch", response_model=BatchResponse[MilestoneResponse])
+async def batch_milestones(
+    request: BatchMilestoneRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)]
+):
+    results = await apply_family_batch(
+        session, Milestone, request.family_id, request.operations, current_user, _milestone_values
     )
-    session.add(milestone)
     await session.commit()
-    await session.refresh(milestone)
     
-    return MilestoneResponse(
-        id=milestone.id,
-        family_id=milestone.family_id,
-        creator_id=milestone.creator_id,
-        event_date=milestone.event_date,
-        content_ciphertext=milestone.content_ciphertext,
-        created_at=milestone.created_at
-    )
+    return results
 
 
-@router.get("/", response_model=List[MilestoneResponse])
+def _milestone_values(op: CreateMilestoneOperation) -> Dict[str, Any]:
+    return {
+        "event_date": op.event_date,
+        "content_ciphertext": op.content_ciphertext
+    }
+
+
+@router.get(
+    "/",
+    response_model=Union[List[MilestoneResponse], Page[MilestoneResponse]],
+    dependencies=[Depends(require_family_member)]
+)
 async def get_milestones(
     family_id: int = Query(...),
     year: Optional[int] = Query(None),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    output_format: ListFormat = Query("json", alias="format"),
     *,
-    current_user: Annotated[User, Depends(get_current_user)],
-    session: Annotated[AsyncSession, Depends(get_session)]
+    page: Annotated[PageParams, Depends()],
+    request: Request,
+    response: Response,
+    session: Annotated[AsyncSession, Depends(get_read_session)]
 ):
-    result = await session.execute(
-        select(FamilyMember).where(
-            FamilyMember.family_id == family_id,
-            FamilyMember.user_id == current_user.id
-        )
-    )
-    member = result.scalar_one_or_none()
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this family"
-        )
+    etag = await get_family_list_etag(request, session, family_id, "milestone")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
     
-    query = select(Milestone).where(Milestone.family_id == family_id)
+    query = select(*response_columns(Milestone, MilestoneResponse)).where(Milestone.family_id == family_id)
     
     if year:
         query = query.where(
             Milestone.event_date >= date(year, 1, 1),
             Milestone.event_date <= date(year, 12, 31)
         )
+    query = filter_event_dates(query, date_from, date_to)
+    
+    if output_format == "ndjson":
+        query = query.order_by(Milestone.event_date.desc(), Milestone.id.desc())
+        return ndjson_response(session, query, MilestoneResponse, etag)
+    set_etag(response, etag)
     
-    query = query.order_by(Milestone.event_date.desc())
+    query = keyset_paginate(query, Milestone.event_date, Milestone.id, page)
     
     result = await session.execute(query)
-    milestones = result.scalars().all()
+    milestones = result.mappings().all()
+    return paginated_response(milestones, page, "event_date")
+
+
+@router.get(
+    "/timeline",
+    response_model=List[TimelineBucket],
+    dependencies=[Depends(require_family_member)]
+)
+async def get_milestone_timeline(
+    family_id: int = Query(...),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    *,
+    request: Request,
+    response: Response,
+    session: Annotated[AsyncSession, Depends(get_read_session)]
+):
+    etag = await get_family_list_etag(request, session, family_id, "milestone")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
     
-    return [
-        MilestoneResponse(
-            id=m.id,
-            family_id=m.family_id,
-            creator_id=m.creator_id,
-            event_date=m.event_date,
-            content_ciphertext=m.content_ciphertext,
-            created_at=m.created_at
-        )
-        for m in milestones
-    ]
+    result = await session.execute(timeline_query(family_id, date_from, date_to))
+    return result.mappings().all()
+
+
+def filter_event_dates(query: Select, date_from: Optional[date], date_to: Optional[date]) -> Select:
+    if date_from:
+        query = query.where(Milestone.event_date >= date_from)
+    if date_to:
+        query = query.where(Milestone.event_date <= date_to)
+    return query
+
+
+def timeline_query(
+    family_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Select:
+    """按年、月统计里程碑数量，只读取 (family_id, event_date) 索引中的列，不读取密文。"""
+    year = func.extract("year", Milestone.event_date).cast(Integer)
+    month = func.extract("month", Milestone.event_date).cast(Integer)
+    query = (
+        select(year.label("year"), month.label("month"), func.count().label("count"))
+        .where(Milestone.family_id == family_id)
+        .group_by(year, month)
+        .order_by(year.desc(), month.desc())
+    )
+    return filter_event_dates(query, date_from, date_to)
 
 
 @router.put("/{milestone_id}", response_model=MilestoneResponse)
@@ -126,42 +202,10 @@ async def update_milestone(
     current_user: Annotated[User, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
-    result = await session.execute(
-        select(Milestone).where(Milestone.id == milestone_id)
-    )
-    milestone = result.scalar_one_or_none()
-    if not milestone:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Milestone not found"
-        )
-    
-    result = await session.execute(
-        select(FamilyMember).where(
-            FamilyMember.family_id == milestone.family_id,
-            FamilyMember.user_id == current_user.id
-        )
-    )
-    member = result.scalar_one_or_none()
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this family"
-        )
-    
-    if request.event_date is not None:
-        milestone.event_date = request.event_date
-    if request.content_ciphertext is not None:
-        milestone.content_ciphertext = request.content_ciphertext
+    values = request.model_dump(exclude_none=True)
+    values["updated_at"] = datetime.utcnow()
     
+    row = await update_family_resource(session, Milestone, milestone_id, values, current_user)
     await session.commit()
-    await session.refresh(milestone)
     
-    return MilestoneResponse(
-        id=milestone.id,
-        family_id=milestone.family_id,
-        creator_id=milestone.creator_id,
-        event_date=milestone.event_date,
-        content_ciphertext=milestone.content_ciphertext,
-        created_at=milestone.created_at
-    )
+    return row
@@ -1,17 +1,27 @@
-from typing import Annotated, List, Optional, Literal
+from typing import Annotated, Any, Dict, List, Optional, Literal, Union
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Query, Request, Response
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
-from app.api.deps import get_current_user
-from app.db.session import get_session
+from app.api.batch import MAX_BATCH_OPERATIONS, BatchResponse, DeleteOperation, apply_family_batch
+from app.api.deps import get_current_user, get_family_resource, require_family_member
+from app.api.etag import get_family_list_etag, is_not_modified, not_modified_response, set_etag
+from app.api.fast_lists import fast_list_response, fetch_list_json
+from app.api.pagination import Page, PageParams, keyset_paginate, paginated_response
+from app.api.responses import ListView, ResponseModel, response_columns
+from app.api.streaming import ListFormat, ndjson_response
+from app.api.writes import delete_family_resource, insert_family_resource, update_family_resource
+from app.core.config import settings
+from app.db.session import get_read_session, get_session
 from app.models.user import User
-from app.models.family import FamilyMember
 from app.models.note import Note
 
 router = APIRouter()
 
+# 列表的 summary 视图不返回正文密文，需要时通过 GET /note/{note_id} 获取
+NOTE_SUMMARY_EXCLUDE = frozenset({"content_ciphertext"})
+
 
 class CreateNoteRequest(BaseModel):
     family_id: int
@@ -26,12 +36,32 @@ class UpdateNoteRequest(BaseModel):
     category: Optional[Literal["地址信息", "药方", "API密钥"]] = None
 
 
-class NoteResponse(BaseModel):
+class CreateNoteOperation(BaseModel):
+    op: Literal["create"]
+    title_ciphertext: str
+    content_ciphertext: str
+    category: Optional[Literal["地址信息", "药方", "API密钥"]] = "地址信息"
+
+
+class UpdateNoteOperation(UpdateNoteRequest):
+    op: Literal["update"]
+    id: int
+
+
+class BatchNoteRequest(BaseModel):
+    family_id: int
+    operations: List[Annotated[
+        Union[CreateNoteOperation, UpdateNoteOperation, DeleteOperation],
+        Field(discriminator="op")
+    ]] = Field(..., min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+
+class NoteResponse(ResponseModel):
     id: int
     family_id: int
     creator_id: int
     title_ciphertext: str
-    content_ciphertext: str
+    content_ciphertext: Optional[str] = None
     category: Optional[Literal["地址信息", "药方", "API密钥"]]
     created_at: datetime
     updated_at: datetime
@@ -43,84 +73,90 @@ async def create_note(
     current_user: Annotated[User, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
-    result = await session.execute(
-        select(FamilyMember).where(
-            FamilyMember.family_id == request.family_id,
-            FamilyMember.user_id == current_user.id
-        )
-    )
-    member = result.scalar_one_or_none()
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this family"
-        )
+    row = await insert_family_resource(session, Note, {
+        "family_id": request.family_id,
+        "creator_id": current_user.id,
+        "title_ciphertext": request.title_ciphertext,
+        "content_ciphertext": request.content_ciphertext,
+        "category": request.category or "地址信息"
+    }, current_user)
+    await session.commit()
     
-    note = Note(
-        family_id=request.family_id,
-        creator_id=current_user.id,
-        title_ciphertext=request.title_ciphertext,
-        content_ciphertext=request.content_ciphertext,
-        category=request.category or "地址信息"
+    return row
+
+
+@router.post("/batch", response_model=BatchResponse[NoteResponse])
+async def batch_notes(
+    request: BatchNoteRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)]
+):
+    results = await apply_family_batch(
+        session, Note, request.family_id, request.operations, current_user, _note_values
     )
-    session.add(note)
     await session.commit()
-    await session.refresh(note)
     
-    return NoteResponse(
-        id=note.id,
-        family_id=note.family_id,
-        creator_id=note.creator_id,
-        title_ciphertext=note.title_ciphertext,
-        content_ciphertext=note.content_ciphertext,
-        category=note.category,
-        created_at=note.created_at,
-        updated_at=note.updated_at
-    )
+    return results
+
 
+def _note_values(op: CreateNoteOperation) -> Dict[str, Any]:
+    return {
+        "title_ciphertext": op.title_ciphertext,
+        "content_ciphertext": op.content_ciphertext,
+        "category": op.category or "地址信息"
+    }
 
-@router.get("/", response_model=List[NoteResponse])
+
+@router.get(
+    "/",
+    response_model=Union[List[NoteResponse], Page[NoteResponse]],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(require_family_member)]
+)
 async def get_notes(
     family_id: int = Query(...),
     category: Optional[Literal["地址信息", "药方", "API密钥"]] = None,
+    view: ListView = Query("detail"),
+    output_format: ListFormat = Query("json", alias="format"),
     *,
-    current_user: Annotated[User, Depends(get_current_user)],
-    session: Annotated[AsyncSession, Depends(get_session)]
+    page: Annotated[PageParams, Depends()],
+    request: Request,
+    response: Response,
+    session: Annotated[AsyncSession, Depends(get_read_session)]
 ):
-    result = await session.execute(
-        select(FamilyMember).where(
-            FamilyMember.family_id == family_id,
-            FamilyMember.user_id == current_user.id
-        )
-    )
-    member = result.scalar_one_or_none()
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this family"
-        )
+    etag = await get_family_list_etag(request, session, family_id, "note")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
     
-    query = select(Note).where(Note.family_id == family_id)
+    exclude = NOTE_SUMMARY_EXCLUDE if view == "summary" else ()
+    query = select(*response_columns(Note, NoteResponse, exclude)).where(Note.family_id == family_id)
     if category:
         query = query.where(Note.category == category)
-    query = query.order_by(Note.created_at.desc())
+    if output_format == "ndjson":
+        query = query.order_by(Note.created_at.desc(), Note.id.desc())
+        return ndjson_response(session, query, NoteResponse, etag)
+    if settings.FAST_LIST_RESPONSES:
+        content = await fetch_list_json(
+            session, Note, NoteResponse, "created_at", family_id, page,
+            {"category": category}, exclude
+        )
+        return fast_list_response(content, etag)
+    set_etag(response, etag)
     
-    result = await session.execute(query)
-    notes = result.scalars().all()
+    query = keyset_paginate(query, Note.created_at, Note.id, page)
     
-    return [
-        NoteResponse(
-            id=n.id,
-            family_id=n.family_id,
-            creator_id=n.creator_id,
-            title_ciphertext=n.title_ciphertext,
-            content_ciphertext=n.content_ciphertext,
-            category=n.category,
-            created_at=n.created_at,
-            updated_at=n.updated_at
-        )
-        for n in notes
-    ]
+    result = await session.execute(query)
+    notes = result.mappings().all()
+    return paginated_response(notes, page, "created_at")
+
+
+@router.get("/{note_id}", response_model=NoteResponse)
+async def get_note(
+    note_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_read_session)]
+):
+    return await get_family_resource(session, Note, note_id, current_user)
 
 
 @router.put("/{note_id}", response_model=NoteResponse)
@@ -130,51 +166,13 @@ async def update_note(
     current_user: Annotated[User, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
-    result = await session.execute(
-        select(Note).where(Note.id == note_id)
-    )
-    note = result.scalar_one_or_none()
-    if not note:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Note not found"
-        )
-    
-    result = await session.execute(
-        select(FamilyMember).where(
-            FamilyMember.family_id == note.family_id,
-            FamilyMember.user_id == current_user.id
-        )
-    )
-    member = result.scalar_one_or_none()
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this family"
-        )
-    
-    if request.title_ciphertext is not None:
-        note.title_ciphertext = request.title_ciphertext
-    if request.content_ciphertext is not None:
-        note.content_ciphertext = request.content_ciphertext
-    if request.category is not None:
-        note.category = request.category
-    
-    note.updated_at = datetime.utcnow()
+    values = request.model_dump(exclude_none=True)
+    values["updated_at"] = datetime.utcnow()
     
+    row = await update_family_resource(session, Note, note_id, values, current_user)
     await session.commit()
-    await session.refresh(note)
     
-    return NoteResponse(
-        id=note.id,
-        family_id=note.family_id,
-        creator_id=note.creator_id,
-        title_ciphertext=note.title_ciphertext,
-        content_ciphertext=note.content_ciphertext,
-        category=note.category,
-        created_at=note.created_at,
-        updated_at=note.updated_at
-    )
+    return row
 
 
 @router.delete("/{note_id}")
@@ -183,30 +181,7 @@ async def delete_note(
     current_user: Annotated[User, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
-    result = await session.execute(
-        select(Note).where(Note.id == note_id)
-    )
-    note = result.scalar_one_or_none()
-    if not note:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Note not found"
-        )
-    
-    result = await session.execute(
-        select(FamilyMember).where(
-            FamilyMember.family_id == note.family_id,
-            FamilyMember.user_id == current_user.id
-        )
-    )
-    member = result.scalar_one_or_none()
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this family"
-        )
-    
-    await session.delete(note)
+    await delete_family_resource(session, Note, note_id, current_user)
     await session.commit()
     
     return {"message": "Note deleted successfully"}
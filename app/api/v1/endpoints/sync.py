@@ -0,0 +1,115 @@
+from typing import Annotated, List, Literal, Optional, Tuple
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+from app.api.deps import require_family_member
+from app.api.responses import ResponseModel
+from app.api.v1.endpoints.milestone import MilestoneResponse
+from app.api.v1.endpoints.note import NoteResponse
+from app.api.v1.endpoints.todo import TodoResponse
+from app.db.session import get_session
+from app.models.change import Tombstone, sync_watermark
+from app.models.milestone import Milestone
+from app.models.note import Note
+from app.models.todo import Todo
+
+router = APIRouter()
+
+
+class TombstoneResponse(ResponseModel):
+    resource: Literal["todo", "note", "milestone"]
+    id: int
+    deleted_at: datetime
+
+
+class SyncResponse(ResponseModel):
+    todos: List[TodoResponse]
+    notes: List[NoteResponse]
+    milestones: List[MilestoneResponse]
+    tombstones: List[TombstoneResponse]
+    next_cursor: str
+    has_more: bool
+
+
+def _encode_cursor(change_xid: int, change_seq: int) -> str:
+    return f"{change_xid}:{change_seq}"
+
+
+def _decode_since(since: Optional[str]) -> Tuple[int, int]:
+    """游标为 "事务号:变更序号"；旧版本的纯序号游标对应迁移前写入的记录，事务号为 0。"""
+    if since is None:
+        return 0, 0
+    try:
+        parts = [int(part) for part in since.split(":")]
+    except ValueError:
+        parts = []
+    if len(parts) == 1:
+        parts.insert(0, 0)
+    if len(parts) != 2 or min(parts) < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return parts[0], parts[1]
+
+
+@router.get("/", response_model=SyncResponse, dependencies=[Depends(require_family_member)])
+async def sync_changes(
+    family_id: int = Query(...),
+    since: Optional[str] = Query(None),
+    limit: int = Query(500, ge=1, le=1000),
+    *,
+    session: Annotated[AsyncSession, Depends(get_session)]
+):
+    since_xid, since_seq = _decode_since(since)
+    # change_seq 在写入时分配、按提交顺序可见，只按序号推进游标会跳过晚提交的写入。
+    # 按 (事务号, 序号) 排序并只返回水位线之前已结束事务的变更：之后才可见的写入事务号都不小于水位线。
+    # 水位线只取一次，四个查询使用同一个值
+    watermark = await session.scalar(select(sync_watermark()))
+
+    changes = []
+    for model in (Todo, Note, Milestone, Tombstone):
+        result = await session.execute(
+            select(model)
+            .where(
+                model.family_id == family_id,
+                tuple_(model.change_xid, model.change_seq) > tuple_(since_xid, since_seq),
+                model.change_xid < watermark
+            )
+            .order_by(model.change_xid, model.change_seq)
+            .limit(limit + 1)
+        )
+        changes.extend(result.scalars().all())
+
+    changes.sort(key=lambda change: (change.change_xid, change.change_seq))
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    next_cursor = (
+        _encode_cursor(changes[-1].change_xid, changes[-1].change_seq)
+        if changes else _encode_cursor(since_xid, since_seq)
+    )
+
+    response = {
+        "todos": [],
+        "notes": [],
+        "milestones": [],
+        "tombstones": [],
+        "next_cursor": next_cursor,
+        "has_more": has_more
+    }
+    for change in changes:
+        if isinstance(change, Todo):
+            response["todos"].append(change)
+        elif isinstance(change, Note):
+            response["notes"].append(change)
+        elif isinstance(change, Milestone):
+            response["milestones"].append(change)
+        else:
+            response["tombstones"].append({
+                "resource": change.resource,
+                "id": change.resource_id,
+                "deleted_at": change.deleted_at
+            })
+    return response
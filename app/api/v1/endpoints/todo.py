@@ -1,17 +1,27 @@
-from typing import Annotated, List, Optional, Literal
+from typing import Annotated, Any, Dict, List, Optional, Literal, Union
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Query, Request, Response
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
-from app.api.deps import get_current_user
-from app.db.session import get_session
+from app.api.batch import MAX_BATCH_OPERATIONS, BatchResponse, DeleteOperation, apply_family_batch
+from app.api.deps import get_current_user, get_family_resource, require_family_member
+from app.api.etag import get_family_list_etag, is_not_modified, not_modified_response, set_etag
+from app.api.fast_lists import fast_list_response, fetch_list_json
+from app.api.pagination import Page, PageParams, keyset_paginate, paginated_response
+from app.api.responses import ListView, ResponseModel, response_columns
+from app.api.streaming import ListFormat, ndjson_response
+from app.api.writes import delete_family_resource, insert_family_resource, update_family_resource
+from app.core.config import settings
+from app.db.session import get_read_session, get_session
 from app.models.user import User
-from app.models.family import FamilyMember
 from app.models.todo import Todo
 
 router = APIRouter()
 
+# 列表的 summary 视图不返回正文密文，需要时通过 GET /todo/{todo_id} 获取
+TODO_SUMMARY_EXCLUDE = frozenset({"description_ciphertext"})
+
 
 class CreateTodoRequest(BaseModel):
     family_id: int
@@ -27,12 +37,32 @@ class UpdateTodoRequest(BaseModel):
     is_completed: Optional[bool] = None
 
 
-class TodoResponse(BaseModel):
+class CreateTodoOperation(BaseModel):
+    op: Literal["create"]
+    title_ciphertext: str
+    description_ciphertext: Optional[str] = None
+    category: Optional[Literal["生活", "学习", "运动", "心愿"]] = "生活"
+
+
+class UpdateTodoOperation(UpdateTodoRequest):
+    op: Literal["update"]
+    id: int
+
+
+class BatchTodoRequest(BaseModel):
+    family_id: int
+    operations: List[Annotated[
+        Union[CreateTodoOperation, UpdateTodoOperation, DeleteOperation],
+        Field(discriminator="op")
+    ]] = Field(..., min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+
+class TodoResponse(ResponseModel):
     id: int
     family_id: int
     creator_id: int
     title_ciphertext: str
-    description_ciphertext: Optional[str]
+    description_ciphertext: Optional[str] = None
     category: Optional[Literal["生活", "学习", "运动", "心愿"]]
     is_completed: bool
     created_at: datetime
@@ -45,83 +75,88 @@ async def create_todo(
     current_user: Annotated[User, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
-    result = await session.execute(
-        select(FamilyMember).where(
-            FamilyMember.family_id == request.family_id,
-            FamilyMember.user_id == current_user.id
-        )
-    )
-    member = result.scalar_one_or_none()
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this family"
-        )
+    row = await insert_family_resource(session, Todo, {
+        "family_id": request.family_id,
+        "creator_id": current_user.id,
+        "title_ciphertext": request.title_ciphertext,
+        "description_ciphertext": request.description_ciphertext,
+        "category": request.category or "生活",
+        "is_completed": False
+    }, current_user)
+    await session.commit()
     
-    todo = Todo(
-        family_id=request.family_id,
-        creator_id=current_user.id,
-        title_ciphertext=request.title_ciphertext,
-        description_ciphertext=request.description_ciphertext,
-        category=request.category or "生活",
-        is_completed=False
+    return row
+
+
+@router.post("/batch", response_model=BatchResponse[TodoResponse])
+async def batch_todos(
+    request: BatchTodoRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_session)]
+):
+    results = await apply_family_batch(
+        session, Todo, request.family_id, request.operations, current_user, _todo_values
     )
-    session.add(todo)
     await session.commit()
-    await session.refresh(todo)
     
-    return TodoResponse(
-        id=todo.id,
-        family_id=todo.family_id,
-        creator_id=todo.creator_id,
-        title_ciphertext=todo.title_ciphertext,
-        description_ciphertext=todo.description_ciphertext,
-        category=todo.category,
-        is_completed=todo.is_completed,
-        created_at=todo.created_at,
-        updated_at=todo.updated_at
-    )
+    return results
+
 
+def _todo_values(op: CreateTodoOperation) -> Dict[str, Any]:
+    return {
+        "title_ciphertext": op.title_ciphertext,
+        "description_ciphertext": op.description_ciphertext,
+        "category": op.category or "生活",
+        "is_completed": False
+    }
 
-@router.get("/", response_model=List[TodoResponse])
+
+@router.get(
+    "/",
+    response_model=Union[List[TodoResponse], Page[TodoResponse]],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(require_family_member)]
+)
 async def get_todos(
     family_id: int = Query(...),
+    view: ListView = Query("detail"),
+    output_format: ListFormat = Query("json", alias="format"),
     *,
-    current_user: Annotated[User, Depends(get_current_user)],
-    session: Annotated[AsyncSession, Depends(get_session)]
+    page: Annotated[PageParams, Depends()],
+    request: Request,
+    response: Response,
+    session: Annotated[AsyncSession, Depends(get_read_session)]
 ):
-    result = await session.execute(
-        select(FamilyMember).where(
-            FamilyMember.family_id == family_id,
-            FamilyMember.user_id == current_user.id
-        )
-    )
-    member = result.scalar_one_or_none()
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this family"
+    etag = await get_family_list_etag(request, session, family_id, "todo")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
+    exclude = TODO_SUMMARY_EXCLUDE if view == "summary" else ()
+    query = select(*response_columns(Todo, TodoResponse, exclude)).where(Todo.family_id == family_id)
+    if output_format == "ndjson":
+        query = query.order_by(Todo.created_at.desc(), Todo.id.desc())
+        return ndjson_response(session, query, TodoResponse, etag)
+    if settings.FAST_LIST_RESPONSES:
+        content = await fetch_list_json(
+            session, Todo, TodoResponse, "created_at", family_id, page, exclude=exclude
         )
+        return fast_list_response(content, etag)
+    set_etag(response, etag)
     
-    query = select(Todo).where(Todo.family_id == family_id).order_by(Todo.created_at.desc())
+    query = keyset_paginate(query, Todo.created_at, Todo.id, page)
     
     result = await session.execute(query)
-    todos = result.scalars().all()
-    
-    return [
-        TodoResponse(
-            id=t.id,
-            family_id=t.family_id,
-            creator_id=t.creator_id,
-            title_ciphertext=t.title_ciphertext,
-            description_ciphertext=t.description_ciphertext,
-            category=t.category,
-            is_completed=t.is_completed,
-            created_at=t.created_at,
-            updated_at=t.updated_at
-        )
-        for t in todos
-    ]
+    todos = result.mappings().all()
+    return paginated_response(todos, page, "created_at")
+
+
+@router.get("/{todo_id}", response_model=TodoResponse)
+async def get_todo(
+    todo_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_read_session)]
+):
+    return await get_family_resource(session, Todo, todo_id, current_user)
 
 
 @router.put("/{todo_id}", response_model=TodoResponse)
@@ -131,54 +166,13 @@ async def update_todo(
     current_user: Annotated[User, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
-    result = await session.execute(
-        select(Todo).where(Todo.id == todo_id)
-    )
-    todo = result.scalar_one_or_none()
-    if not todo:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Todo not found"
-        )
-    
-    result = await session.execute(
-        select(FamilyMember).where(
-            FamilyMember.family_id == todo.family_id,
-            FamilyMember.user_id == current_user.id
-        )
-    )
-    member = result.scalar_one_or_none()
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this family"
-        )
-    
-    if request.title_ciphertext is not None:
-        todo.title_ciphertext = request.title_ciphertext
-    if request.description_ciphertext is not None:
-        todo.description_ciphertext = request.description_ciphertext
-    if request.category is not None:
-        todo.category = request.category
-    if request.is_completed is not None:
-        todo.is_completed = request.is_completed
-    
-    todo.updated_at = datetime.utcnow()
+    values = request.model_dump(exclude_none=True)
+    values["updated_at"] = datetime.utcnow()
     
+    row = await update_family_resource(session, Todo, todo_id, values, current_user)
     await session.commit()
-    await session.refresh(todo)
     
-    return TodoResponse(
-        id=todo.id,
-        family_id=todo.family_id,
-        creator_id=todo.creator_id,
-        title_ciphertext=todo.title_ciphertext,
-        description_ciphertext=todo.description_ciphertext,
-        category=todo.category,
-        is_completed=todo.is_completed,
-        created_at=todo.created_at,
-        updated_at=todo.updated_at
-    )
+    return row
 
 
 @router.delete("/{todo_id}")
@@ -187,30 +181,7 @@ async def delete_todo(
     current_user: Annotated[User, Depends(get_current_user)],
     session: Annotated[AsyncSession, Depends(get_session)]
 ):
-    result = await session.execute(
-        select(Todo).where(Todo.id == todo_id)
-    )
-    todo = result.scalar_one_or_none()
-    if not todo:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Todo not found"
-        )
-    
-    result = await session.execute(
-        select(FamilyMember).where(
-            FamilyMember.family_id == todo.family_id,
-            FamilyMember.user_id == current_user.id
-        )
-    )
-    member = result.scalar_one_or_none()
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not a member of this family"
-        )
-    
-    await session.delete(todo)
+    await delete_family_resource(session, Todo, todo_id, current_user)
     await session.commit()
     
     return {"message": "Todo deleted successfully"}
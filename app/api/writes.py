@@ -0,0 +1,270 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Type
+from fastapi import HTTPException, status
+from sqlalchemy import ARRAY, Integer, RowMapping, String, Table, Text, cast, delete, func, insert, literal, true, update
+from sqlalchemy.dialects.postgresql import Insert, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Subquery
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import SQLModel, select
+from app.api.deps import require_membership
+from app.core.config import settings
+from app.core.events import FAMILY_EVENTS_CHANNEL
+from app.models.change import FamilyStats, FamilyVersion, Tombstone, change_values
+from app.models.family import FamilyMember
+from app.models.user import User
+
+
+# 在 family_stats 中维护分类/完成数计数器的资源，及参与计数的列
+FAMILY_STATS_RESOURCES = {"todo", "note"}
+STATS_COLUMNS = ("category", "is_completed")
+
+StatsDeltas = Dict[str, List[int]]
+
+
+def _bump_family_version(family_id: int, resource: str) -> Insert:
+    """递增 (family_id, resource) 的版本号。
+
+    版本号行是同一家庭所有写入共享的热点锁，所有写入须按同一顺序加锁：
+    先写资源记录（多条时按 id 顺序锁定），再累加 family_stats（按分类顺序），
+    最后递增版本号。递增之后不要再锁其它记录，否则会与并发写入互相等待而死锁。
+    """
+    stmt = pg_insert(FamilyVersion).values(family_id=family_id, resource=resource, version=1)
+    return stmt.on_conflict_do_update(
+        index_elements=[FamilyVersion.family_id, FamilyVersion.resource],
+        set_={"version": FamilyVersion.version + 1}
+    )
+
+
+def _change_payload(
+    family_id: ColumnElement,
+    resource: ColumnElement,
+    version: ColumnElement,
+    action: ColumnElement,
+    resource_id: ColumnElement,
+) -> ColumnElement:
+    payload = func.json_build_object(
+        "family_id", family_id,
+        "resource", resource,
+        "version", version,
+        "action", action,
+        "id", resource_id
+    )
+    return func.pg_notify(FAMILY_EVENTS_CHANNEL, cast(payload, Text))
+
+
+async def record_family_change(
+    session: AsyncSession,
+    family_id: int,
+    resource: str,
+    action: str,
+    resource_id: int,
+) -> None:
+    """递增版本号并发送事件；须在记录和 family_stats 写入之后最后调用，见 _bump_family_version。"""
+    stmt = _bump_family_version(family_id, resource)
+    if settings.FAMILY_EVENTS_ENABLED:
+        stmt = stmt.returning(_change_payload(
+            FamilyVersion.family_id, FamilyVersion.resource, FamilyVersion.version,
+            literal(action, String), literal(resource_id, Integer)
+        ))
+    await session.execute(stmt)
+
+
+async def record_family_changes(
+    session: AsyncSession,
+    family_id: int,
+    resource: str,
+    changes: Sequence[Tuple[str, int]],
+) -> None:
+    """批量写入只递增一次版本号，并在同一条语句中为每个 (action, 资源 id) 各发送一条事件。
+
+    与 record_family_change 相同，须在所有记录和 family_stats 写入之后最后调用。
+    """
+    stmt = _bump_family_version(family_id, resource)
+    if not settings.FAMILY_EVENTS_ENABLED:
+        await session.execute(stmt)
+        return
+    version = stmt.returning(
+        FamilyVersion.family_id, FamilyVersion.resource, FamilyVersion.version
+    ).cte("bumped_version")
+    changed = func.unnest(
+        literal([action for action, _ in changes], ARRAY(String)),
+        literal([resource_id for _, resource_id in changes], ARRAY(Integer))
+    ).table_valued("action", "id").render_derived(name="changed")
+    await session.execute(
+        select(_change_payload(
+            version.c.family_id, version.c.resource, version.c.version,
+            changed.c.action, changed.c.id
+        )).select_from(version).join(changed, true())
+    )
+
+
+def tracks_family_stats(table: Table) -> bool:
+    return table.name in FAMILY_STATS_RESOURCES
+
+
+def count_family_stats(
+    rows: Iterable[Mapping[str, Any]],
+    sign: int,
+    deltas: Optional[StatsDeltas] = None,
+) -> StatsDeltas:
+    """把一组记录按分类累加到 {category: [total, completed]} 增量中，删除时 sign 为 -1。"""
+    deltas = {} if deltas is None else deltas
+    for row in rows:
+        counts = deltas.setdefault(row["category"] or "", [0, 0])
+        counts[0] += sign
+        if row.get("is_completed"):
+            counts[1] += sign
+    return deltas
+
+
+async def apply_family_stats(
+    session: AsyncSession,
+    family_id: int,
+    resource: str,
+    deltas: StatsDeltas,
+) -> None:
+    """在当前事务中用一条 upsert 把增量累加到 family_stats。
+
+    upsert 按行的顺序锁定计数器，按分类排序保证所有写入以同一顺序加锁，
+    避免方向相反的分类修改（A→B 与 B→A）互相等待而死锁。
+    """
+    rows = [
+        {
+            "family_id": family_id,
+            "resource": resource,
+            "category": category,
+            "total": total,
+            "completed": completed
+        }
+        for category, (total, completed) in sorted(deltas.items())
+        if total or completed
+    ]
+    if not rows:
+        return
+    stmt = pg_insert(FamilyStats).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[FamilyStats.family_id, FamilyStats.resource, FamilyStats.category],
+        set_={
+            "total": FamilyStats.total + stmt.excluded.total,
+            "completed": FamilyStats.completed + stmt.excluded.completed
+        }
+    )
+    await session.execute(stmt)
+
+
+def previous_stats_values(table: Table, ids: Sequence[int], *conditions: ColumnElement) -> Subquery:
+    """锁定并读取即将更新的记录的旧分类/完成状态，供 UPDATE ... FROM 在 RETURNING 中返回。
+
+    conditions 须与 UPDATE 的权限条件一致，避免锁住调用方无权修改的记录。
+    """
+    columns = [table.c[name] for name in STATS_COLUMNS if name in table.c]
+    return (
+        select(table.c.id, *columns)
+        .where(table.c.id.in_(ids), *conditions)
+        .with_for_update()
+        .subquery("previous")
+    )
+
+
+def previous_stats_rows(rows: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {name: row.get(f"previous_{name}") for name in STATS_COLUMNS}
+        for row in rows
+    ]
+
+
+def returning_previous(previous: Subquery) -> List[ColumnElement]:
+    return [column.label(f"previous_{column.name}") for column in previous.c if column.name != "id"]
+
+
+def _member_families_filter(table: Table, current_user: User) -> ColumnElement:
+    # 记录的家庭在写入前未知，权限条件放在写语句中，非成员不会锁住或修改记录
+    return table.c.family_id.in_(
+        select(FamilyMember.family_id).where(FamilyMember.user_id == current_user.id)
+    )
+
+
+async def _raise_missing_or_forbidden(session: AsyncSession, model: Type[SQLModel], resource_id: int) -> None:
+    table = model.__table__
+    exists = await session.scalar(select(table.c.id).where(table.c.id == resource_id))
+    if exists is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{model.__name__} not found"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="You are not a member of this family"
+    )
+
+
+async def insert_family_resource(
+    session: AsyncSession,
+    model: Type[SQLModel],
+    values: Dict[str, Any],
+    current_user: User,
+) -> RowMapping:
+    table = model.__table__
+    await require_membership(session, current_user, values["family_id"])
+    result = await session.execute(insert(table).values(values).returning(*table.c))
+    row = result.mappings().one()
+    if tracks_family_stats(table):
+        await apply_family_stats(session, row["family_id"], table.name, count_family_stats([row], 1))
+    await record_family_change(session, row["family_id"], table.name, "created", row["id"])
+    return row
+
+
+async def update_family_resource(
+    session: AsyncSession,
+    model: Type[SQLModel],
+    resource_id: int,
+    values: Dict[str, Any],
+    current_user: User,
+) -> RowMapping:
+    table = model.__table__
+    is_member = _member_families_filter(table, current_user)
+    stmt = (
+        update(table)
+        .where(table.c.id == resource_id, is_member)
+        .values({**values, **change_values()})
+        .returning(*table.c)
+    )
+    previous = None
+    if tracks_family_stats(table) and any(name in values for name in STATS_COLUMNS):
+        previous = previous_stats_values(table, [resource_id], is_member)
+        stmt = stmt.where(table.c.id == previous.c.id).returning(*returning_previous(previous))
+    result = await session.execute(stmt)
+    row = result.mappings().first()
+    if row is None:
+        await _raise_missing_or_forbidden(session, model, resource_id)
+    if previous is not None:
+        deltas = count_family_stats(previous_stats_rows([row]), -1)
+        await apply_family_stats(
+            session, row["family_id"], table.name, count_family_stats([row], 1, deltas)
+        )
+    await record_family_change(session, row["family_id"], table.name, "updated", row["id"])
+    return row
+
+
+async def delete_family_resource(
+    session: AsyncSession,
+    model: Type[SQLModel],
+    resource_id: int,
+    current_user: User,
+) -> None:
+    """删除记录并按 RETURNING 返回的行扣减计数、写入删除标记，并发删除同一记录时只有一方成功。"""
+    table = model.__table__
+    columns = [table.c[name] for name in STATS_COLUMNS if name in table.c]
+    result = await session.execute(
+        delete(table)
+        .where(table.c.id == resource_id, _member_families_filter(table, current_user))
+        .returning(table.c.id, table.c.family_id, *columns)
+    )
+    row = result.mappings().first()
+    if row is None:
+        await _raise_missing_or_forbidden(session, model, resource_id)
+    if tracks_family_stats(table):
+        await apply_family_stats(session, row["family_id"], table.name, count_family_stats([row], -1))
+    # 删除标记在下一条语句执行前刷新写入，仍在递增版本号之前
+    session.add(Tombstone(family_id=row["family_id"], resource=table.name, resource_id=row["id"]))
+    await record_family_change(session, row["family_id"], table.name, "deleted", row["id"])
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import logging
+from typing import Dict, Optional, Set
+from app.core.config import settings
+from app.core.metrics import FAMILY_EVENT_SUBSCRIBERS, FAMILY_EVENTS_DROPPED
+
+logger = logging.getLogger(__name__)
+
+FAMILY_EVENTS_CHANNEL = "family_events"
+
+SSE_PING = ": ping\n\n"
+SSE_RESYNC = "event: resync\ndata: {}\n\n"
+
+
+class FamilyEventBroker:
+    def __init__(self, queue_size: int, heartbeat_seconds: float):
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, family_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(family_id, set()).add(queue)
+        FAMILY_EVENT_SUBSCRIBERS.inc()
+        return queue
+
+    def unsubscribe(self, family_id: int, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(family_id)
+        if queues is None or queue not in queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[family_id]
+        FAMILY_EVENT_SUBSCRIBERS.dec()
+
+    def publish(self, payload: str) -> None:
+        try:
+            family_id = int(json.loads(payload)["family_id"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed family event: %r", payload)
+            return
+        message = f"event: change\ndata: {payload}\n\n"
+        for queue in self._subscribers.get(family_id, ()):
+            self._offer(queue, message)
+
+    def broadcast(self, message: Optional[str]) -> None:
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._offer(queue, message)
+
+    def resync_all(self) -> None:
+        self.broadcast(SSE_RESYNC)
+
+    def _offer(self, queue: asyncio.Queue, message: Optional[str]) -> None:
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            FAMILY_EVENTS_DROPPED.inc(queue.qsize())
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(SSE_RESYNC if message is not None else None)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            self.broadcast(SSE_PING)
+
+    def start(self) -> None:
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat(), name="family-events-heartbeat")
+
+    async def stop(self) -> None:
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        self.broadcast(None)
+
+
+family_events = FamilyEventBroker(
+    queue_size=settings.FAMILY_EVENTS_QUEUE_SIZE,
+    heartbeat_seconds=settings.FAMILY_EVENTS_HEARTBEAT_SECONDS,
+)
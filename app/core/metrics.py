@@ -0,0 +1,92 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth",
+    "Password hash jobs waiting for a free hashing slot",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_WAIT_SECONDS = Histogram(
+    "password_hash_wait_seconds",
+    "Time a password hash job spent waiting for a hashing slot",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent hashing or verifying a password",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5),
+)
+ACCESS_TOKEN_CACHE_REQUESTS = Counter(
+    "access_token_cache_requests_total",
+    "Verified access token cache lookups",
+    ["result"],
+)
+PRINCIPAL_CACHE_REQUESTS = Counter(
+    "principal_cache_requests_total",
+    "Authenticated principal cache lookups",
+    ["result"],
+)
+MEMBERSHIP_CACHE_REQUESTS = Counter(
+    "membership_cache_requests_total",
+    "Family membership lookups by result: cache hit, cache miss or token claims",
+    ["result"],
+)
+MEMBERSHIP_CACHE_INVALIDATIONS = Counter(
+    "membership_cache_invalidations_total",
+    "Family membership cache entries dropped by cross-worker notifications",
+)
+FAMILY_EVENT_SUBSCRIBERS = Gauge(
+    "family_event_subscribers",
+    "Open family change feed subscriptions",
+    multiprocess_mode="livesum",
+)
+FAMILY_EVENTS_DROPPED = Counter(
+    "family_events_dropped_total",
+    "Change events dropped for slow subscribers (replaced by a resync)",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 12, 20, 50),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Total time spent in SQL statements per HTTP request",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP responses by route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Database connections currently checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Database connections opened beyond pool_size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 10.0),
+)
@@ -1,11 +1,63 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import jwt
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Tuple, Type
 from passlib.context import CryptContext
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import (
+    ACCESS_TOKEN_CACHE_REQUESTS,
+    PASSWORD_HASH_QUEUE_DEPTH,
+    PASSWORD_HASH_SECONDS,
+    PASSWORD_HASH_WAIT_SECONDS,
+)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+MEMBERSHIPS_CLAIM = "fam"
+MEMBERSHIP_VERSION_CLAIM = "mv"
+
+_hash_executor: Optional[Executor] = None
+_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+_hash_waiting = 0
+
+
+class PasswordHashQueueFullError(Exception):
+    pass
+
+
+class InvalidTokenError(Exception):
+    pass
+
+
+class JWTBackend(NamedTuple):
+    encode: Callable[..., str]
+    decode: Callable[..., Dict[str, Any]]
+    errors: Tuple[Type[Exception], ...]
+
+
+def load_jwt_backend(name: str) -> JWTBackend:
+    """按名称加载 JWT 实现，两种实现签发和校验的令牌格式相同。"""
+    if name == "pyjwt":
+        try:
+            import jwt
+        except ImportError as exc:
+            raise RuntimeError('JWT_BACKEND=pyjwt requires PyJWT: pip install "PyJWT>=2.8.0"') from exc
+        return JWTBackend(jwt.encode, jwt.decode, (jwt.PyJWTError,))
+    from jose import JWTError, jwt
+    return JWTBackend(jwt.encode, jwt.decode, (JWTError,))
+
+
+jwt_backend = load_jwt_backend(settings.JWT_BACKEND)
+
+# 已校验令牌的摘要到声明的映射，条目在令牌的 exp 时过期
+verified_tokens: TTLCache[str, Dict[str, Any]] = TTLCache(
+    maxsize=settings.ACCESS_TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -15,6 +67,58 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash",
+            )
+    return _hash_executor
+
+
+async def _run_hash_job(operation: str, func: Callable[..., Any], *args: Any) -> Any:
+    global _hash_waiting
+    if _hash_waiting >= settings.PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordHashQueueFullError()
+
+    _hash_waiting += 1
+    PASSWORD_HASH_QUEUE_DEPTH.inc()
+    queued_at = time.perf_counter()
+    try:
+        await _hash_slots.acquire()
+    finally:
+        _hash_waiting -= 1
+        PASSWORD_HASH_QUEUE_DEPTH.dec()
+
+    started_at = time.perf_counter()
+    PASSWORD_HASH_WAIT_SECONDS.observe(started_at - queued_at)
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _hash_slots.release()
+        PASSWORD_HASH_SECONDS.labels(operation).observe(time.perf_counter() - started_at)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hash_job("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hash_job("hash", get_password_hash, password)
+
+
+def shutdown_password_hashing() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -22,5 +126,61 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt_backend.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
+
+
+def access_token_digest(token: str) -> str:
+    """访问令牌的摘要，已校验令牌缓存和认证主体缓存都以它为键。"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def decode_access_token(token: str, digest: Optional[str] = None) -> Dict[str, Any]:
+    """校验访问令牌并返回其声明；返回的字典可能被缓存共享，调用方不应修改。
+
+    调用方已计算 access_token_digest(token) 时通过 digest 传入，避免重复计算摘要。
+    """
+    if not settings.ACCESS_TOKEN_CACHE_ENABLED:
+        digest = None
+    elif digest is None:
+        digest = access_token_digest(token)
+    if digest is not None:
+        claims = verified_tokens.get(digest)
+        if claims is not None:
+            ACCESS_TOKEN_CACHE_REQUESTS.labels("hit").inc()
+            return claims
+        ACCESS_TOKEN_CACHE_REQUESTS.labels("miss").inc()
+
+    try:
+        claims = jwt_backend.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except jwt_backend.errors as exc:
+        raise InvalidTokenError() from exc
+
+    if digest is not None:
+        expires_at = claims.get("exp")
+        if isinstance(expires_at, (int, float)):
+            ttl = expires_at - time.time()
+            if ttl > 0:
+                verified_tokens.set(digest, claims, ttl=ttl)
+        else:
+            verified_tokens.set(digest, claims)
+    return claims
+
+
+def membership_claims(memberships: Mapping[int, str], version: int) -> Dict[str, Any]:
+    """生成写入访问令牌的成员关系声明：家庭 id 到角色的映射以及签发时的成员关系版本。"""
+    return {
+        MEMBERSHIPS_CLAIM: {str(family_id): role for family_id, role in memberships.items()},
+        MEMBERSHIP_VERSION_CLAIM: version,
+    }
+
+
+def parse_membership_claims(payload: Mapping[str, Any], version: int) -> Optional[Dict[int, str]]:
+    """令牌中的成员关系版本与用户当前版本一致时返回家庭 id 到角色的映射，否则返回 None。"""
+    memberships = payload.get(MEMBERSHIPS_CLAIM)
+    if payload.get(MEMBERSHIP_VERSION_CLAIM) != version or not isinstance(memberships, dict):
+        return None
+    try:
+        return {int(family_id): role for family_id, role in memberships.items()}
+    except ValueError:
+        return None
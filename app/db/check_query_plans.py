@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import json
+import sys
+from datetime import date
+from typing import Iterator, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Select
+from sqlmodel import select
+from app.api.pagination import PageParams, keyset_paginate
+from app.api.v1.endpoints.milestone import filter_event_dates, timeline_query
+from app.db.session import engine
+from app.models import Family, FamilyMember, Milestone, Note, Todo
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+# Aggregates sort their (small) grouped output; only the scans must stay on the index.
+SORT_ALLOWED = {"get_my_families", "get_milestone_timeline"}
+
+
+def build_queries(family_id: int, user_id: int) -> List[Tuple[str, Select, str]]:
+    page = PageParams(limit=50, cursor=None)
+    return [
+        (
+            "get_todos",
+            keyset_paginate(select(Todo).where(Todo.family_id == family_id), Todo.created_at, Todo.id, page),
+            "ix_todo_family_id_created_at_id",
+        ),
+        (
+            "get_notes",
+            keyset_paginate(select(Note).where(Note.family_id == family_id), Note.created_at, Note.id, page),
+            "ix_note_family_id_created_at_id",
+        ),
+        (
+            "get_milestones",
+            keyset_paginate(select(Milestone).where(Milestone.family_id == family_id), Milestone.event_date, Milestone.id, page),
+            "ix_milestone_family_id_event_date_id",
+        ),
+        (
+            "get_milestones_range",
+            keyset_paginate(
+                filter_event_dates(
+                    select(Milestone).where(Milestone.family_id == family_id),
+                    date(2024, 1, 1),
+                    date(2024, 12, 31),
+                ),
+                Milestone.event_date,
+                Milestone.id,
+                page,
+            ),
+            "ix_milestone_family_id_event_date_id",
+        ),
+        (
+            "get_milestone_timeline",
+            timeline_query(family_id),
+            "ix_milestone_family_id_event_date_id",
+        ),
+        (
+            "get_my_families",
+            select(FamilyMember, Family).join(Family).where(FamilyMember.user_id == user_id),
+            "ix_family_member_user_id_family_id",
+        ),
+    ]
+
+
+def walk_plan(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk_plan(child)
+
+
+async def check_query_plans(family_id: int, user_id: int, allow_seqscan: bool) -> bool:
+    ok = True
+    async with engine.connect() as conn:
+        async with conn.begin():
+            if not allow_seqscan:
+                await conn.execute(text("SET LOCAL enable_seqscan = off"))
+                await conn.execute(text("SET LOCAL enable_bitmapscan = off"))
+            for name, query, expected_index in build_queries(family_id, user_id):
+                sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+                result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+                plan = result.scalar_one()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                nodes = list(walk_plan(plan[0]["Plan"]))
+                uses_index = any(
+                    node["Node Type"] in INDEX_SCANS and node.get("Index Name") == expected_index
+                    for node in nodes
+                )
+                sorts = [node for node in nodes if node["Node Type"] in ("Sort", "Incremental Sort")]
+                passed = uses_index and (name in SORT_ALLOWED or not sorts)
+                ok = ok and passed
+                print(f"[{'OK' if passed else 'FAIL'}] {name}: expected {expected_index}")
+                for node in nodes:
+                    print(f"    {node['Node Type']} {node.get('Index Name', '')}".rstrip())
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Verify that the hot list and membership queries use the composite indexes."
+    )
+    parser.add_argument("--family-id", type=int, default=1)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument(
+        "--allow-seqscan",
+        action="store_true",
+        help="keep seq/bitmap scans enabled; small tables will then legitimately plan them",
+    )
+    args = parser.parse_args()
+    ok = asyncio.run(check_query_plans(args.family_id, args.user_id, args.allow_seqscan))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.metrics import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_OVERFLOW,
+    DB_POOL_WAIT_SECONDS,
+    DB_QUERIES_PER_REQUEST,
+    DB_TIME_PER_REQUEST,
+)
+from app.core.monitoring import route_template
+
+logger = logging.getLogger(__name__)
+
+
+class RequestQueryStats:
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        return route_template(self.scope)
+
+
+current_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    record_query(statement, time.perf_counter() - conn.info["query_start_time"].pop())
+
+
+def record_query(statement: str, elapsed: float) -> None:
+    """记录一条 SQL 的耗时；绕过 SQLAlchemy 直接执行的语句需手动调用。"""
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s",
+            elapsed * 1000,
+            stats.route if stats is not None else "-",
+            " ".join(statement.split()),
+        )
+
+
+def _handle_error(exception_context: Any) -> None:
+    starts = exception_context.connection.info.get("query_start_time") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """记录取连接的等待时间以及已借出 / 溢出连接数的连接池。"""
+
+    def _do_get(self) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT_SECONDS.labels(self._metrics_label).observe(time.perf_counter() - started_at)
+            self._report_usage()
+
+    def _do_return_conn(self, record: Any) -> None:
+        try:
+            super()._do_return_conn(record)
+        finally:
+            self._report_usage()
+
+    @property
+    def _metrics_label(self) -> str:
+        return self._orig_logging_name or "default"
+
+    def _report_usage(self) -> None:
+        DB_POOL_CHECKED_OUT.labels(self._metrics_label).set(self.checkedout())
+        DB_POOL_OVERFLOW.labels(self._metrics_label).set(max(self.overflow(), 0))
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope)
+        token = current_query_stats.set(stats)
+
+        async def send_with_stats(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{stats.seconds * 1000:.1f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            current_query_stats.reset(token)
+            route = stats.route
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.seconds)
+            budget = settings.QUERY_BUDGET_PER_REQUEST
+            if budget and stats.count > budget:
+                logger.warning(
+                    "%s %s ran %d queries (budget %d, %.1f ms in DB)",
+                    scope["method"], route, stats.count, budget, stats.seconds * 1000,
+                )
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+import asyncpg
+from app.db.session import asyncpg_dsn
+
+logger = logging.getLogger(__name__)
+
+NotificationHandler = Callable[[str], None]
+ReconnectHandler = Callable[[], None]
+
+
+class PgListener:
+    def __init__(self, dsn_factory: Callable[[], str] = asyncpg_dsn, retry_seconds: float = 2.0):
+        self._dsn_factory = dsn_factory
+        self._retry_seconds = retry_seconds
+        self._handlers: Dict[str, List[NotificationHandler]] = {}
+        self._reconnect_handlers: List[ReconnectHandler] = []
+        self._connection: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._connected_once = False
+
+    def add_handler(self, channel: str, handler: NotificationHandler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def add_reconnect_handler(self, handler: ReconnectHandler) -> None:
+        self._reconnect_handlers.append(handler)
+
+    def start(self) -> None:
+        if self._task is None and self._handlers:
+            self._task = asyncio.create_task(self._run(), name="pg-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _dispatch(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception("Notification handler for %s failed", channel)
+
+    async def _listen_once(self) -> None:
+        lost = asyncio.Event()
+        connection = await asyncpg.connect(self._dsn_factory())
+        self._connection = connection
+        try:
+            connection.add_termination_listener(lambda _: lost.set())
+            for channel in self._handlers:
+                await connection.add_listener(channel, self._dispatch)
+            if self._connected_once:
+                for handler in self._reconnect_handlers:
+                    handler()
+            self._connected_once = True
+            await lost.wait()
+        finally:
+            self._connection = None
+            if not connection.is_closed():
+                await connection.close(timeout=5)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen_once()
+                logger.warning("LISTEN connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncpg.PostgresError, asyncio.TimeoutError) as exc:
+                logger.warning("LISTEN connection failed: %s", exc)
+            await asyncio.sleep(self._retry_seconds)
+
+
+pg_listener = PgListener()
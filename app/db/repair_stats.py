@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+from typing import Dict, Optional, Tuple, Type
+from sqlalchemy import delete, func, literal, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import Select
+from sqlmodel import SQLModel
+from app.db.session import engine
+from app.models import FamilyStats, Note, Todo
+
+StatsKey = Tuple[int, str, str]
+
+
+def _recount(model: Type[SQLModel], family_id: Optional[int]) -> Select:
+    completed = (
+        func.count().filter(model.is_completed)
+        if hasattr(model, "is_completed")
+        else literal(0)
+    )
+    category = func.coalesce(model.category, literal_column("''"))
+    query = select(
+        model.family_id,
+        literal(model.__tablename__),
+        category,
+        func.count(),
+        completed,
+    ).group_by(model.family_id, category)
+    if family_id is not None:
+        query = query.where(model.family_id == family_id)
+    return query
+
+
+async def _snapshot(conn: AsyncConnection, family_id: Optional[int]) -> Dict[StatsKey, Tuple[int, int]]:
+    query = select(
+        FamilyStats.family_id,
+        FamilyStats.resource,
+        FamilyStats.category,
+        FamilyStats.total,
+        FamilyStats.completed,
+    )
+    if family_id is not None:
+        query = query.where(FamilyStats.family_id == family_id)
+    result = await conn.execute(query)
+    return {
+        (row.family_id, row.resource, row.category): (row.total, row.completed)
+        for row in result
+        if row.total or row.completed
+    }
+
+
+async def repair_family_stats(family_id: Optional[int] = None) -> Dict[StatsKey, tuple]:
+    """从 todo/note 表批量重算 family_stats，返回修正前后不一致的计数器。"""
+    async with engine.begin() as conn:
+        # 阻止并发写入在重算期间累加增量；已写入资源但尚未提交的事务会在重算提交后再累加
+        await conn.execute(text("LOCK TABLE family_stats IN EXCLUSIVE MODE"))
+        before = await _snapshot(conn, family_id)
+
+        stmt = delete(FamilyStats)
+        if family_id is not None:
+            stmt = stmt.where(FamilyStats.family_id == family_id)
+        await conn.execute(stmt)
+        columns = ["family_id", "resource", "category", "total", "completed"]
+        for model in (Todo, Note):
+            await conn.execute(
+                pg_insert(FamilyStats).from_select(columns, _recount(model, family_id))
+            )
+
+        after = await _snapshot(conn, family_id)
+    return {
+        key: (before.get(key, (0, 0)), after.get(key, (0, 0)))
+        for key in before.keys() | after.keys()
+        if before.get(key) != after.get(key)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Recompute the per-family todo/note counters in family_stats."
+    )
+    parser.add_argument("--family-id", type=int, help="only repair this family")
+    args = parser.parse_args()
+
+    async def run() -> Dict[StatsKey, tuple]:
+        try:
+            return await repair_family_stats(args.family_id)
+        finally:
+            await engine.dispose()
+
+    drift = asyncio.run(run())
+    for (family_id, resource, category), (before, after) in sorted(drift.items()):
+        print(
+            f"family {family_id} {resource} {category or '(none)'}: "
+            f"total {before[0]} -> {after[0]}, completed {before[1]} -> {after[1]}"
+        )
+    print(f"Repaired {len(drift)} counter(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,120 @@
-from typing import AsyncGenerator
+import asyncio
+import hashlib
+import itertools
+import logging
+import time
+from typing import AsyncGenerator, List, Optional
+from fastapi import Request
 from sqlmodel import SQLModel
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.db.instrumentation import InstrumentedQueuePool, instrument_engine
 
-engine = create_async_engine(settings.DATABASE_URL, echo=True, future=True)
+logger = logging.getLogger(__name__)
+
+READ_PRIMARY_HEADER = "x-read-primary"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def create_engine_for(database_url: str, name: str, **connect_args) -> AsyncEngine:
+    engine = create_async_engine(
+        database_url,
+        echo=settings.DATABASE_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        connect_args={
+            "statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+            "command_timeout": settings.DATABASE_COMMAND_TIMEOUT,
+            **connect_args,
+        },
+    )
+    instrument_engine(engine)
+    return engine
+
+
+engine = create_engine_for(settings.DATABASE_URL, "primary")
+
+async_session_factory = async_sessionmaker(
+    engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
+class Replica:
+    def __init__(self, name: str, database_url: str):
+        self.name = name
+        self.engine = create_engine_for(
+            database_url, name, timeout=settings.DATABASE_REPLICA_CONNECT_TIMEOUT
+        )
+        self.session_factory = async_sessionmaker(
+            self.engine, class_=AsyncSession, expire_on_commit=False
+        )
+        self.ejected_until = 0.0
+
+
+class ReplicaSet:
+    """只读副本集合：轮询选择副本，连接失败的副本在冷却期内被剔除。"""
+
+    def __init__(self, database_urls: List[str], eject_seconds: float):
+        self.replicas = [
+            Replica(f"replica-{index}", url) for index, url in enumerate(database_urls)
+        ]
+        self.eject_seconds = eject_seconds
+        self._next = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def candidates(self) -> List[Replica]:
+        now = time.monotonic()
+        start = next(self._next) % len(self.replicas)
+        ordered = self.replicas[start:] + self.replicas[:start]
+        return [replica for replica in ordered if replica.ejected_until <= now]
+
+    def eject(self, replica: Replica, reason: BaseException) -> None:
+        replica.ejected_until = time.monotonic() + self.eject_seconds
+        logger.warning(
+            "Read replica %s ejected for %.0fs: %s", replica.name, self.eject_seconds, reason
+        )
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+read_replicas = ReplicaSet(
+    settings.DATABASE_REPLICA_URLS, settings.DATABASE_REPLICA_EJECT_SECONDS
+)
+
+# 发生写操作的客户端（按 Authorization 头区分）在短时间内读主库，保证读到自己的写入
+_recent_writers: TTLCache[str, bool] = TTLCache(
+    maxsize=10000, ttl=settings.READ_PRIMARY_STICKY_SECONDS
+)
+
+
+def _client_key(request: Request) -> Optional[str]:
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+
+def _reads_primary(request: Request) -> bool:
+    if request.headers.get(READ_PRIMARY_HEADER, "").lower() in ("1", "true"):
+        return True
+    key = _client_key(request)
+    return key is not None and _recent_writers.get(key, False)
+
+
+def asyncpg_dsn(database_url: str = settings.DATABASE_URL) -> str:
+    return make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
 
 
 async def init_db():
@@ -12,9 +122,43 @@ async def init_db():
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with async_session() as session:
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    if read_replicas and request.method not in SAFE_METHODS:
+        key = _client_key(request)
+        if key is not None:
+            _recent_writers.set(key, True)
+    async with async_session_factory() as session:
+        yield session
+
+
+async def _connect_replica() -> Optional[tuple]:
+    for replica in read_replicas.candidates():
+        session = replica.session_factory()
+        try:
+            await session.connection()
+        except (OSError, asyncio.TimeoutError, DBAPIError) as exc:
+            await session.close()
+            read_replicas.eject(replica, exc)
+            continue
+        return replica, session
+    return None
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    connected = None
+    if read_replicas and not _reads_primary(request):
+        connected = await _connect_replica()
+    if connected is None:
+        async with async_session_factory() as session:
+            yield session
+        return
+
+    replica, session = connected
+    try:
         yield session
+    except DBAPIError as exc:
+        if exc.connection_invalidated:
+            read_replicas.eject(replica, exc)
+        raise
+    finally:
+        await session.close()
@@ -1,24 +1,49 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app.api.deps import MEMBERSHIP_CHANNEL, clear_membership_cache, invalidate_membership
 from app.api.v1.api import api_router
+from app.core.config import settings
+from app.core.events import FAMILY_EVENTS_CHANNEL, family_events
+from app.core.monitoring import RequestMetricsMiddleware, mark_worker_dead, render_metrics
+from app.core.security import shutdown_password_hashing
 from app.db.init_db import init_db
+from app.db.instrumentation import QueryStatsMiddleware
+from app.db.listener import pg_listener
+from app.db.session import read_replicas
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    if settings.FAMILY_EVENTS_ENABLED:
+        pg_listener.add_handler(FAMILY_EVENTS_CHANNEL, family_events.publish)
+        pg_listener.add_reconnect_handler(family_events.resync_all)
+        family_events.start()
+    if settings.MEMBERSHIP_CACHE_ENABLED:
+        pg_listener.add_handler(MEMBERSHIP_CHANNEL, invalidate_membership)
+        pg_listener.add_reconnect_handler(clear_membership_cache)
+    pg_listener.start()
     yield
+    await pg_listener.stop()
+    await family_events.stop()
+    await read_replicas.dispose()
+    shutdown_password_hashing()
+    mark_worker_dead()
 
 
 app = FastAPI(title="Digital Home API", lifespan=lifespan)
 
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-DB-Query-Count", "X-DB-Time-Ms"],
 )
 
 app.include_router(api_router, prefix="/api/v1")
@@ -27,3 +52,9 @@ app.include_router(api_router, prefix="/api/v1")
 @app.get("/")
 async def root():
     return {"message": "Digital Home API"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
@@ -3,5 +3,6 @@ from app.models.family import Family, FamilyMember
 from app.models.milestone import Milestone
 from app.models.todo import Todo
 from app.models.note import Note
+from app.models.change import FamilyStats, FamilyVersion, Tombstone
 
-__all__ = ["User", "Family", "FamilyMember", "Milestone", "Todo", "Note"]
+__all__ = ["User", "Family", "FamilyMember", "Milestone", "Todo", "Note", "Tombstone", "FamilyVersion", "FamilyStats"]
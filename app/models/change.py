@@ -0,0 +1,65 @@
+from typing import Dict, Optional
+from datetime import datetime
+from sqlalchemy import BigInteger, Index, Sequence, Text, cast, func, text
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import Field, SQLModel, Column
+
+CHANGE_SEQ = Sequence("change_seq", metadata=SQLModel.metadata)
+
+# xid8 没有到 bigint 的直接转换，经 text 中转
+CURRENT_XACT_ID_SQL = "(pg_current_xact_id()::text::bigint)"
+
+
+def change_seq_column() -> Column:
+    return Column(BigInteger, server_default=CHANGE_SEQ.next_value(), nullable=False)
+
+
+def change_xid_column() -> Column:
+    return Column(BigInteger, server_default=text(CURRENT_XACT_ID_SQL), nullable=False)
+
+
+def change_values() -> Dict[str, ColumnElement]:
+    """更新记录时重新分配的变更序号和写入事务号。"""
+    return {
+        "change_seq": CHANGE_SEQ.next_value(),
+        "change_xid": cast(cast(func.pg_current_xact_id(), Text), BigInteger),
+    }
+
+
+def sync_watermark() -> ColumnElement:
+    """当前快照中最早的未结束事务号，更小事务号的写入都已提交或回滚。"""
+    return cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger)
+
+
+class Tombstone(SQLModel, table=True):
+    __tablename__ = "tombstone"
+    __table_args__ = (
+        Index("ix_tombstone_family_id_change_xid_change_seq", "family_id", "change_xid", "change_seq"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    family_id: int = Field(foreign_key="family.id")
+    resource: str
+    resource_id: int
+    change_seq: Optional[int] = Field(default=None, sa_column=change_seq_column())
+    change_xid: Optional[int] = Field(default=None, sa_column=change_xid_column())
+    deleted_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class FamilyVersion(SQLModel, table=True):
+    __tablename__ = "family_version"
+    
+    family_id: int = Field(foreign_key="family.id", primary_key=True)
+    resource: str = Field(primary_key=True)
+    version: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
+
+
+class FamilyStats(SQLModel, table=True):
+    __tablename__ = "family_stats"
+    
+    family_id: int = Field(foreign_key="family.id", primary_key=True)
+    resource: str = Field(primary_key=True)
+    # 空字符串表示未分类
+    category: str = Field(primary_key=True)
+    total: int = Field(default=0)
+    completed: int = Field(default=0)
@@ -1,4 +1,5 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Column, String
 
 
@@ -12,6 +13,9 @@ class Family(SQLModel, table=True):
 
 class FamilyMember(SQLModel, table=True):
     __tablename__ = "family_member"
+    __table_args__ = (
+        Index("ix_family_member_user_id_family_id", "user_id", "family_id"),
+    )
     
     family_id: int = Field(foreign_key="family.id", primary_key=True)
     user_id: int = Field(foreign_key="user.id", primary_key=True)
@@ -1,14 +1,23 @@
 from typing import Optional
 from datetime import date, datetime
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel, Column, String
+from app.models.change import change_seq_column, change_xid_column
 
 
 class Milestone(SQLModel, table=True):
     __tablename__ = "milestone"
+    __table_args__ = (
+        Index("ix_milestone_family_id_event_date_id", "family_id", text("event_date DESC"), text("id DESC")),
+        Index("ix_milestone_family_id_change_xid_change_seq", "family_id", "change_xid", "change_seq"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    family_id: int = Field(foreign_key="family.id", index=True)
+    family_id: int = Field(foreign_key="family.id")
     creator_id: int = Field(foreign_key="user.id")
     event_date: date
     content_ciphertext: str = Field(sa_column=Column(String))
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    change_seq: Optional[int] = Field(default=None, sa_column=change_seq_column())
+    change_xid: Optional[int] = Field(default=None, sa_column=change_xid_column())
@@ -1,16 +1,24 @@
 from typing import Optional, Literal
 from datetime import datetime
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel, Column, String
+from app.models.change import change_seq_column, change_xid_column
 
 
 class Note(SQLModel, table=True):
     __tablename__ = "note"
+    __table_args__ = (
+        Index("ix_note_family_id_created_at_id", "family_id", text("created_at DESC"), text("id DESC")),
+        Index("ix_note_family_id_change_xid_change_seq", "family_id", "change_xid", "change_seq"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    family_id: int = Field(foreign_key="family.id", index=True)
+    family_id: int = Field(foreign_key="family.id")
     creator_id: int = Field(foreign_key="user.id")
     title_ciphertext: str = Field(sa_column=Column(String))
     content_ciphertext: str = Field(sa_column=Column(String))
     category: Optional[Literal["地址信息", "药方", "API密钥"]] = Field(default="地址信息", sa_column=Column(String))
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    change_seq: Optional[int] = Field(default=None, sa_column=change_seq_column())
+    change_xid: Optional[int] = Field(default=None, sa_column=change_xid_column())
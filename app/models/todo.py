@@ -1,13 +1,19 @@
 from typing import Optional, Literal
 from datetime import datetime
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel, Column, String
+from app.models.change import change_seq_column, change_xid_column
 
 
 class Todo(SQLModel, table=True):
     __tablename__ = "todo"
+    __table_args__ = (
+        Index("ix_todo_family_id_created_at_id", "family_id", text("created_at DESC"), text("id DESC")),
+        Index("ix_todo_family_id_change_xid_change_seq", "family_id", "change_xid", "change_seq"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    family_id: int = Field(foreign_key="family.id", index=True)
+    family_id: int = Field(foreign_key="family.id")
     creator_id: int = Field(foreign_key="user.id")
     title_ciphertext: str = Field(sa_column=Column(String))
     description_ciphertext: Optional[str] = Field(default=None, sa_column=Column(String))
@@ -15,3 +21,5 @@ class Todo(SQLModel, table=True):
     is_completed: bool = Field(default=False)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    change_seq: Optional[int] = Field(default=None, sa_column=change_seq_column())
+    change_xid: Optional[int] = Field(default=None, sa_column=change_xid_column())
@@ -1,5 +1,5 @@
 from typing import Optional
-from sqlmodel import Field, SQLModel, Column, String
+from sqlmodel import Field, SQLModel, Column, Integer, String
 
 
 class User(SQLModel, table=True):
@@ -12,3 +12,7 @@ class User(SQLModel, table=True):
     public_key: str = Field(sa_column=Column(String))
     encrypted_private_key: str = Field(sa_column=Column(String))
     private_key_salt: str = Field(sa_column=Column(String))
+    # 用户的家庭成员关系每变化一次加一，令牌中的成员关系声明以此判断是否过期
+    membership_version: int = Field(
+        default=0, sa_column=Column(Integer, nullable=False, server_default="0")
+    )
@@ -0,0 +1,134 @@
+"""对比待办列表的 ORM 路径与 asyncpg + orjson 快速路径。
+
+在 DATABASE_URL 指向的数据库中临时创建一个家庭并写入 N 条待办，分别测量两条路径
+从查询到生成 JSON 字节的吞吐（行/秒）和 Python 堆内存峰值，结束后清理测试数据。
+
+    python -m benchmarks.list_fast_path --rows 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+from typing import Awaitable, Callable, List
+from pydantic import TypeAdapter
+from sqlalchemy import delete, text
+from sqlmodel import select
+from app.api.fast_lists import fetch_list_json
+from app.api.pagination import PageParams
+from app.api.v1.endpoints.todo import TodoResponse
+from app.db.session import async_session_factory, engine
+from app.models.family import Family, FamilyMember
+from app.models.todo import Todo
+from app.models.user import User
+
+todo_list_adapter = TypeAdapter(List[TodoResponse])
+
+
+async def orm_path(family_id: int) -> bytes:
+    """与 get_todos 相同：ORM 加载、手工构造响应模型，再按 response_model 校验并序列化。"""
+    async with async_session_factory() as session:
+        result = await session.execute(
+            select(Todo)
+            .where(Todo.family_id == family_id)
+            .order_by(Todo.created_at.desc(), Todo.id.desc())
+        )
+        items = [
+            TodoResponse(
+                id=t.id,
+                family_id=t.family_id,
+                creator_id=t.creator_id,
+                title_ciphertext=t.title_ciphertext,
+                description_ciphertext=t.description_ciphertext,
+                category=t.category,
+                is_completed=t.is_completed,
+                created_at=t.created_at,
+                updated_at=t.updated_at
+            )
+            for t in result.scalars().all()
+        ]
+    content = todo_list_adapter.dump_python(todo_list_adapter.validate_python(items), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+async def fast_path(family_id: int) -> bytes:
+    async with async_session_factory() as session:
+        return await fetch_list_json(
+            session, Todo, TodoResponse, "created_at", family_id, PageParams(limit=None, cursor=None)
+        )
+
+
+async def seed(rows: int) -> tuple:
+    async with async_session_factory() as session:
+        user = User(
+            phone=f"bench-{time.time_ns()}", username="bench", hashed_password="-",
+            public_key="-", encrypted_private_key="-", private_key_salt="-",
+        )
+        session.add(user)
+        await session.flush()
+        family = Family(name="bench", owner_id=user.id)
+        session.add(family)
+        await session.flush()
+        session.add(FamilyMember(family_id=family.id, user_id=user.id, encrypted_family_key="-"))
+        await session.execute(
+            text(
+                "INSERT INTO todo (family_id, creator_id, title_ciphertext, description_ciphertext,"
+                " category, is_completed, created_at, updated_at)"
+                " SELECT :family_id, :user_id, repeat('t', 64) || n, repeat('d', 256), '生活', n % 3 = 0,"
+                " now() - n * interval '1 second', now()"
+                " FROM generate_series(1, :rows) AS n"
+            ),
+            {"family_id": family.id, "user_id": user.id, "rows": rows},
+        )
+        await session.commit()
+        return user.id, family.id
+
+
+async def cleanup(user_id: int, family_id: int) -> None:
+    async with async_session_factory() as session:
+        await session.execute(delete(Todo).where(Todo.family_id == family_id))
+        await session.execute(delete(FamilyMember).where(FamilyMember.family_id == family_id))
+        await session.execute(delete(Family).where(Family.id == family_id))
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.commit()
+
+
+async def measure(path: Callable[[int], Awaitable[bytes]], family_id: int, repeat: int) -> tuple:
+    await path(family_id)
+    best = float("inf")
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        content = await path(family_id)
+        best = min(best, time.perf_counter() - started_at)
+
+    tracemalloc.start()
+    await path(family_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, content
+
+
+async def main(row_counts: List[int], repeat: int) -> None:
+    print(f"{'rows':>8} {'path':>6} {'seconds':>9} {'rows/sec':>10} {'peak MiB':>9}")
+    for rows in row_counts:
+        user_id, family_id = await seed(rows)
+        try:
+            results = {}
+            for name, path in (("orm", orm_path), ("fast", fast_path)):
+                seconds, peak, content = await measure(path, family_id, repeat)
+                results[name] = content
+                print(f"{rows:>8} {name:>6} {seconds:>9.3f} {rows / seconds:>10.0f} {peak / 2**20:>9.1f}")
+            assert json.loads(results["orm"]) == json.loads(results["fast"]), "wire format differs"
+        finally:
+            await cleanup(user_id, family_id)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.getLogger("app.db.instrumentation").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,98 @@
+"""对比家庭路由在三种成员校验方式下每个请求的数据库往返次数和耗时。
+
+在 DATABASE_URL 指向的数据库中临时创建一个家庭并写入少量待办，通过 ASGI 在进程内调用
+真实的应用路由（由 X-DB-Query-Count 统计每个请求执行的 SQL 条数），结束后清理测试数据：
+
+- lookup：每个请求查询 family_member（关闭成员关系缓存，相当于每个 worker 缓存未命中）
+- cached：成员关系缓存命中
+- claims：令牌中携带成员关系声明（MEMBERSHIP_CLAIMS_ENABLED），且关闭成员关系缓存
+
+三种方式都开启 PRINCIPAL_CACHE，只比较成员校验本身。
+
+    python -m benchmarks.membership_claims --requests 200
+"""
+import argparse
+import asyncio
+import logging
+import time
+import warnings
+from typing import Dict
+import httpx
+from sqlmodel import select
+from app.api.deps import clear_membership_cache, clear_principal_cache
+from app.core.config import settings
+from app.core.security import create_access_token, membership_claims
+from app.db.session import async_session_factory, engine
+from app.main import app
+from app.models.family import FamilyMember
+from app.models.todo import Todo
+from benchmarks.list_fast_path import cleanup, seed
+
+MODES = {
+    "lookup": {"MEMBERSHIP_CACHE_ENABLED": False, "MEMBERSHIP_CLAIMS_ENABLED": False},
+    "cached": {"MEMBERSHIP_CACHE_ENABLED": True, "MEMBERSHIP_CLAIMS_ENABLED": False},
+    "claims": {"MEMBERSHIP_CACHE_ENABLED": False, "MEMBERSHIP_CLAIMS_ENABLED": True},
+}
+
+
+async def tokens(user_id: int, family_id: int) -> Dict[str, str]:
+    async with async_session_factory() as session:
+        role = await session.scalar(
+            select(FamilyMember.role).where(
+                FamilyMember.family_id == family_id, FamilyMember.user_id == user_id
+            )
+        )
+    plain = create_access_token(data={"sub": str(user_id)})
+    with_claims = create_access_token(
+        data={"sub": str(user_id), **membership_claims({family_id: role}, 0)}
+    )
+    return {"lookup": plain, "cached": plain, "claims": with_claims}
+
+
+async def main(requests: int) -> None:
+    user_id, family_id = await seed(20)
+    settings.DEBUG = True
+    try:
+        async with async_session_factory() as session:
+            todo_id = await session.scalar(select(Todo.id).where(Todo.family_id == family_id).limit(1))
+        routes = {
+            "todo list": f"/api/v1/todo/?family_id={family_id}",
+            "todo detail": f"/api/v1/todo/{todo_id}",
+            "family stats": f"/api/v1/family/{family_id}/stats",
+            "sync": f"/api/v1/sync/?family_id={family_id}",
+        }
+        mode_tokens = await tokens(user_id, family_id)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            print(f"{'route':>13} {'mode':>7} {'queries/request':>16} {'ms/request':>11}")
+            for name, path in routes.items():
+                queries: Dict[str, int] = {}
+                for mode, overrides in MODES.items():
+                    for key, value in overrides.items():
+                        setattr(settings, key, value)
+                    clear_membership_cache()
+                    clear_principal_cache()
+                    headers = {"Authorization": f"Bearer {mode_tokens[mode]}"}
+                    for _ in range(10):
+                        response = await client.get(path, headers=headers)
+                        assert response.status_code == 200, response.text
+                    started_at = time.perf_counter()
+                    for _ in range(requests):
+                        response = await client.get(path, headers=headers)
+                    elapsed = (time.perf_counter() - started_at) / requests
+                    queries[mode] = int(response.headers["X-DB-Query-Count"])
+                    print(f"{name:>13} {mode:>7} {queries[mode]:>16} {elapsed * 1000:>11.2f}")
+                saved = queries["lookup"] - queries["claims"]
+                print(f"{'':>13} claims saves {saved} round trip(s) per request over lookup")
+    finally:
+        await cleanup(user_id, family_id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore")
+    logging.getLogger("app.db.instrumentation").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,102 @@
+"""对比 1000 条待办列表在不同响应写法下每个请求消耗的 CPU 时间。
+
+在 DATABASE_URL 指向的数据库中临时写入一个家庭的待办，通过 ASGI 在进程内调用三个路由
+（查询条件相同，只有响应层不同），结束后清理测试数据：
+
+- before：旧写法，查询 ORM 对象、手工构造 TodoResponse，FastAPI 再按 response_model 校验
+- after：只查询响应模型需要的列，返回 mappings，由 response_model 校验一次并直接序列化为 JSON
+- after_orjson：在 after 的基础上指定 ORJSONResponse
+
+    python -m benchmarks.response_serialization --items 1000 --requests 200
+"""
+import argparse
+import asyncio
+import logging
+import time
+import warnings
+from typing import List
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from sqlmodel import select
+from app.api.responses import response_columns
+from app.api.v1.endpoints.todo import TodoResponse
+from app.db.session import async_session_factory, engine
+from app.models.todo import Todo
+from benchmarks.list_fast_path import cleanup, seed
+
+
+def build_app(family_id: int) -> FastAPI:
+    app = FastAPI()
+
+    def ordered(query):
+        return query.where(Todo.family_id == family_id).order_by(Todo.created_at.desc(), Todo.id.desc())
+
+    @app.get("/before", response_model=List[TodoResponse])
+    async def before():
+        async with async_session_factory() as session:
+            result = await session.execute(ordered(select(Todo)))
+            todos = result.scalars().all()
+        return [
+            TodoResponse(
+                id=t.id,
+                family_id=t.family_id,
+                creator_id=t.creator_id,
+                title_ciphertext=t.title_ciphertext,
+                description_ciphertext=t.description_ciphertext,
+                category=t.category,
+                is_completed=t.is_completed,
+                created_at=t.created_at,
+                updated_at=t.updated_at
+            )
+            for t in todos
+        ]
+
+    @app.get("/after", response_model=List[TodoResponse])
+    async def after():
+        async with async_session_factory() as session:
+            result = await session.execute(ordered(select(*response_columns(Todo, TodoResponse))))
+            return result.mappings().all()
+
+    @app.get("/after_orjson", response_model=List[TodoResponse], response_class=ORJSONResponse)
+    async def after_orjson():
+        async with async_session_factory() as session:
+            result = await session.execute(ordered(select(*response_columns(Todo, TodoResponse))))
+            return result.mappings().all()
+
+    return app
+
+
+async def main(items: int, requests: int, rounds: int) -> None:
+    user_id, family_id = await seed(items)
+    try:
+        transport = httpx.ASGITransport(app=build_app(family_id))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            bodies = {}
+            print(f"{'variant':>13} {'CPU ms/request':>15}")
+            for path in ("/before", "/after", "/after_orjson"):
+                for _ in range(10):
+                    await client.get(path)
+                best = float("inf")
+                for _ in range(rounds):
+                    started_at = time.process_time()
+                    for _ in range(requests):
+                        response = await client.get(path)
+                    best = min(best, (time.process_time() - started_at) / requests)
+                bodies[path] = response.json()
+                print(f"{path.lstrip('/'):>13} {best * 1000:>15.2f}")
+        assert bodies["/before"] == bodies["/after"] == bodies["/after_orjson"]
+    finally:
+        await cleanup(user_id, family_id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore")
+    logging.getLogger("app.db.instrumentation").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.requests, args.rounds))
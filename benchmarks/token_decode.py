@@ -0,0 +1,67 @@
+"""对比每个请求校验访问令牌的 CPU 开销。
+
+不需要数据库，对同一个令牌重复校验，输出每次校验的平均耗时：
+
+- jose / pyjwt：每次都做签名校验和 JSON 解析（pyjwt 需安装可选依赖 PyJWT）
+- memoized：decode_access_token 命中已校验令牌缓存（计算摘要并查表）
+
+令牌带 5 个家庭的成员关系声明，接近开启 MEMBERSHIP_CLAIMS_ENABLED 时的大小。
+
+    python -m benchmarks.token_decode --iterations 20000
+"""
+import argparse
+import time
+from typing import Callable
+from app.core.config import settings
+from app.core.security import (
+    create_access_token,
+    decode_access_token,
+    load_jwt_backend,
+    membership_claims,
+)
+
+
+def per_call(func: Callable[[], object], iterations: int, rounds: int) -> float:
+    for _ in range(min(iterations, 1000)):
+        func()
+    best = float("inf")
+    for _ in range(rounds):
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        best = min(best, (time.perf_counter() - started_at) / iterations)
+    return best
+
+
+def main(iterations: int, rounds: int) -> None:
+    token = create_access_token(
+        data={"sub": "42", **membership_claims({i: "member" for i in range(1, 6)}, 3)}
+    )
+    key, algorithms = settings.SECRET_KEY, [settings.ALGORITHM]
+    variants = {}
+    for name in ("jose", "pyjwt"):
+        try:
+            backend = load_jwt_backend(name)
+        except RuntimeError as exc:
+            print(f"skipping {name}: {exc}")
+            continue
+        variants[name] = lambda backend=backend: backend.decode(token, key, algorithms=algorithms)
+
+    settings.ACCESS_TOKEN_CACHE_ENABLED = True
+    expected = decode_access_token(token)
+    variants["memoized"] = lambda: decode_access_token(token)
+    for name, func in variants.items():
+        assert func() == expected, name
+
+    print(f"token length: {len(token)} bytes")
+    print(f"{'variant':>9} {'µs/request':>11}")
+    for name, func in variants.items():
+        print(f"{name:>9} {per_call(func, iterations, rounds) * 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    main(args.iterations, args.rounds)
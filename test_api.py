@@ -4,8 +4,12 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import asyncio
 import base64
 import os
+import random
 
 BASE_URL = "http://localhost:8000/api/v1"
 
@@ -183,18 +187,667 @@ def test_get_public_key_not_found():
         return False
 
 
+def test_batch_partial_updates(token):
+    """测试批量更新只修改部分字段（未设置的字段保持原值）"""
+    print("=" * 60)
+    print("测试批量更新部分字段")
+    print("=" * 60 + "\n")
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        response = requests.post(
+            f"{BASE_URL}/family/",
+            json={"name": "batch_test", "encrypted_family_key": "key"},
+            headers=headers
+        )
+        family_id = response.json()["id"]
+        
+        todo = requests.post(
+            f"{BASE_URL}/todo/",
+            json={"family_id": family_id, "title_ciphertext": "title"},
+            headers=headers
+        ).json()
+        requests.put(f"{BASE_URL}/todo/{todo['id']}", json={"is_completed": True}, headers=headers)
+        note = requests.post(
+            f"{BASE_URL}/note/",
+            json={"family_id": family_id, "title_ciphertext": "title", "content_ciphertext": "content"},
+            headers=headers
+        ).json()
+        milestone = requests.post(
+            f"{BASE_URL}/milestone/",
+            json={"family_id": family_id, "event_date": "2024-05-01", "content_ciphertext": "content"},
+            headers=headers
+        ).json()
+        
+        cases = [
+            ("todo", {"op": "update", "id": todo["id"], "title_ciphertext": "title2"},
+             {"title_ciphertext": "title2", "is_completed": True}),
+            ("note", {"op": "update", "id": note["id"], "content_ciphertext": "content2"},
+             {"content_ciphertext": "content2", "title_ciphertext": "title"}),
+            ("milestone", {"op": "update", "id": milestone["id"], "content_ciphertext": "content2"},
+             {"content_ciphertext": "content2", "event_date": "2024-05-01"}),
+        ]
+        for resource, operation, expected in cases:
+            print(f"测试批量更新{resource}...")
+            response = requests.post(
+                f"{BASE_URL}/{resource}/batch",
+                json={"family_id": family_id, "operations": [operation]},
+                headers=headers
+            )
+            print(f"响应状态码: {response.status_code}")
+            if response.status_code != 200:
+                print(f"✗ 批量更新失败: {response.text}\n")
+                return False
+            result = response.json()["results"][0]
+            item = result["item"]
+            if result["status"] != 200 or any(item[key] != value for key, value in expected.items()):
+                print(f"✗ 批量更新结果不符合预期: {result}\n")
+                return False
+        
+        print("\n✓ 批量更新部分字段成功\n")
+        return True
+    except requests.exceptions.ConnectionError:
+        print("✗ 无法连接到服务器\n")
+        return False
+
+
+def create_test_family(headers, name):
+    """创建测试用家庭，返回家庭 ID"""
+    response = requests.post(
+        f"{BASE_URL}/family/",
+        json={"name": name, "encrypted_family_key": "key"},
+        headers=headers
+    )
+    return response.json()["id"]
+
+
+def test_concurrent_category_moves(token):
+    """测试并发修改待办分类（A→B 与 B→A 同时进行）不会死锁，且分类计数正确"""
+    print("=" * 60)
+    print("测试并发修改分类")
+    print("=" * 60 + "\n")
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        family_id = create_test_family(headers, "stats_concurrency_test")
+        todos = [
+            requests.post(
+                f"{BASE_URL}/todo/",
+                json={"family_id": family_id, "title_ciphertext": "title", "category": category},
+                headers=headers
+            ).json()
+            for category in ["生活", "学习"] * 20
+        ]
+        
+        # 每轮把 生活 改为 学习、学习 改为 生活，两个方向的事务同时更新同一组计数器
+        moves = []
+        for round_index in range(5):
+            for todo in todos:
+                flipped = (todo["category"] == "生活") == (round_index % 2 == 0)
+                moves.append((todo["id"], "学习" if flipped else "生活"))
+        
+        def move(item):
+            todo_id, category = item
+            return requests.put(
+                f"{BASE_URL}/todo/{todo_id}", json={"category": category}, headers=headers
+            ).status_code
+        
+        print(f"并发发送 {len(moves)} 个分类修改请求...")
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            codes = list(executor.map(move, moves))
+        failed = [code for code in codes if code != 200]
+        if failed:
+            print(f"✗ {len(failed)} 个请求失败，状态码: {sorted(set(failed))}\n")
+            return False
+        
+        # 5 轮之后每条待办都停在与初始相反的分类上，两类数量仍各为 20
+        stats = requests.get(f"{BASE_URL}/family/{family_id}/stats", headers=headers).json()
+        print(f"统计: {stats['todo']}")
+        if stats["todo"]["total"] != 40 or stats["todo"]["by_category"] != {"生活": 20, "学习": 20}:
+            print("✗ 并发修改后分类计数不正确\n")
+            return False
+        
+        print("\n✓ 并发修改分类成功\n")
+        return True
+    except requests.exceptions.ConnectionError:
+        print("✗ 无法连接到服务器\n")
+        return False
+
+
+def test_concurrent_batches(token):
+    """测试并发批量操作（更新顺序相互交错，同时创建和删除）不会死锁"""
+    print("=" * 60)
+    print("测试并发批量操作")
+    print("=" * 60 + "\n")
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        family_id = create_test_family(headers, "batch_concurrency_test")
+        
+        def create_todos(count):
+            response = requests.post(
+                f"{BASE_URL}/todo/batch",
+                json={
+                    "family_id": family_id,
+                    "operations": [
+                        {"op": "create", "title_ciphertext": "title", "category": "生活"}
+                    ] * count
+                },
+                headers=headers
+            )
+            return [result["id"] for result in response.json()["results"]]
+        
+        todo_ids = create_todos(100)
+        batch_count = 60
+        
+        # 每个批量请求以随机顺序更新、删除同一组待办中的记录，一半的请求同时创建新待办
+        batches = []
+        for index in range(batch_count):
+            picked = random.sample(todo_ids, 12)
+            category = random.choice(["生活", "学习", "运动", "心愿"])
+            creates = [{"op": "create", "title_ciphertext": "title", "category": category}]
+            batches.append(
+                (creates if index % 2 else [])
+                + [{"op": "update", "id": todo_id, "category": category} for todo_id in picked[:10]]
+                + [{"op": "delete", "id": todo_id} for todo_id in picked[10:]]
+            )
+        
+        def apply(operations):
+            return requests.post(
+                f"{BASE_URL}/todo/batch",
+                json={"family_id": family_id, "operations": operations},
+                headers=headers
+            ).status_code
+        
+        print(f"并发发送 {batch_count} 个批量请求...")
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            codes = list(executor.map(apply, batches))
+        failed = [code for code in codes if code != 200]
+        if failed:
+            print(f"✗ {len(failed)} 个请求失败，状态码: {sorted(set(failed))}\n")
+            return False
+        
+        # 计数器应与删除、创建之后实际剩余的待办数量一致
+        stats = requests.get(f"{BASE_URL}/family/{family_id}/stats", headers=headers).json()
+        remaining = requests.get(
+            f"{BASE_URL}/todo/", params={"family_id": family_id}, headers=headers
+        ).json()
+        print(f"统计: {stats['todo']}，实际待办数: {len(remaining)}")
+        if stats["todo"]["total"] != len(remaining):
+            print("✗ 并发批量操作后计数不正确\n")
+            return False
+        
+        print("\n✓ 并发批量操作成功\n")
+        return True
+    except requests.exceptions.ConnectionError:
+        print("✗ 无法连接到服务器\n")
+        return False
+
+
+def test_concurrent_family_writes(token):
+    """测试同一家庭内并发的单条创建、修改、删除与批量操作不会死锁，且计数器与实际记录一致"""
+    print("=" * 60)
+    print("测试同一家庭的并发写入")
+    print("=" * 60 + "\n")
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    categories = ["生活", "学习", "运动", "心愿"]
+    try:
+        family_id = create_test_family(headers, "family_writes_concurrency_test")
+        todo_ids = [
+            requests.post(
+                f"{BASE_URL}/todo/",
+                json={"family_id": family_id, "title_ciphertext": "title", "category": category},
+                headers=headers
+            ).json()["id"]
+            for category in categories * 10
+        ]
+        note_ids = [
+            requests.post(
+                f"{BASE_URL}/note/",
+                json={"family_id": family_id, "title_ciphertext": "title", "content_ciphertext": "content"},
+                headers=headers
+            ).json()["id"]
+            for _ in range(10)
+        ]
+        
+        def write(index):
+            todo_id = random.choice(todo_ids)
+            kind = index % 6
+            if kind == 0:
+                return requests.post(
+                    f"{BASE_URL}/todo/",
+                    json={"family_id": family_id, "title_ciphertext": "title", "category": random.choice(categories)},
+                    headers=headers
+                )
+            if kind == 1:
+                return requests.put(
+                    f"{BASE_URL}/todo/{todo_id}",
+                    json={"category": random.choice(categories), "is_completed": random.random() < 0.5},
+                    headers=headers
+                )
+            if kind == 2:
+                return requests.delete(f"{BASE_URL}/todo/{todo_id}", headers=headers)
+            if kind == 3:
+                picked = random.sample(todo_ids, 6)
+                return requests.post(
+                    f"{BASE_URL}/todo/batch",
+                    json={
+                        "family_id": family_id,
+                        "operations": [
+                            {"op": "update", "id": picked_id, "is_completed": random.random() < 0.5}
+                            for picked_id in picked[:5]
+                        ] + [
+                            {"op": "delete", "id": picked[5]},
+                            {"op": "create", "title_ciphertext": "title", "category": random.choice(categories)},
+                        ]
+                    },
+                    headers=headers
+                )
+            if kind == 4:
+                return requests.put(
+                    f"{BASE_URL}/note/{random.choice(note_ids)}",
+                    json={"category": random.choice(["地址信息", "药方", "API密钥"])},
+                    headers=headers
+                )
+            return requests.post(
+                f"{BASE_URL}/note/",
+                json={"family_id": family_id, "title_ciphertext": "title", "content_ciphertext": "content"},
+                headers=headers
+            )
+        
+        print("并发发送 240 个写入请求...")
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            codes = [response.status_code for response in executor.map(write, range(240))]
+        # 被其它请求先删除的待办返回 404，除此之外不应有失败
+        failed = [code for code in codes if code not in (200, 404)]
+        if failed:
+            print(f"✗ {len(failed)} 个请求失败，状态码: {sorted(set(failed))}\n")
+            return False
+        
+        stats = requests.get(f"{BASE_URL}/family/{family_id}/stats", headers=headers).json()
+        for resource in ("todo", "note"):
+            items = requests.get(
+                f"{BASE_URL}/{resource}/", params={"family_id": family_id}, headers=headers
+            ).json()
+            print(f"{resource} 统计: {stats[resource]}，实际数量: {len(items)}")
+            if stats[resource]["total"] != len(items):
+                print(f"✗ 并发写入后 {resource} 计数不正确\n")
+                return False
+            if resource == "todo" and stats["todo"]["completed"] != sum(item["is_completed"] for item in items):
+                print("✗ 并发写入后已完成待办计数不正确\n")
+                return False
+        
+        print("\n✓ 同一家庭的并发写入成功\n")
+        return True
+    except requests.exceptions.ConnectionError:
+        print("✗ 无法连接到服务器\n")
+        return False
+
+
+def run_with_database(work):
+    """在测试进程内直接访问服务端使用的数据库（读取与服务端相同的 DATABASE_URL 配置）"""
+    from app.db.session import engine
+    
+    async def run():
+        try:
+            return await work(engine)
+        finally:
+            await engine.dispose()
+    
+    return asyncio.run(run())
+
+
+def test_sync_paging_and_watermark(token):
+    """测试增量同步分页、删除墓碑，以及游标不会越过尚未提交的写入"""
+    print("=" * 60)
+    print("测试增量同步")
+    print("=" * 60 + "\n")
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        family_id = create_test_family(headers, "sync_test")
+        
+        def sync(since=None, limit=None):
+            params = {"family_id": family_id}
+            if since is not None:
+                params["since"] = since
+            if limit is not None:
+                params["limit"] = limit
+            return requests.get(f"{BASE_URL}/sync/", params=params, headers=headers)
+        
+        todo_ids = [
+            requests.post(
+                f"{BASE_URL}/todo/",
+                json={"family_id": family_id, "title_ciphertext": f"title{index}"},
+                headers=headers
+            ).json()["id"]
+            for index in range(5)
+        ]
+        note_id = requests.post(
+            f"{BASE_URL}/note/",
+            json={"family_id": family_id, "title_ciphertext": "title", "content_ciphertext": "content"},
+            headers=headers
+        ).json()["id"]
+        requests.put(f"{BASE_URL}/todo/{todo_ids[0]}", json={"is_completed": True}, headers=headers)
+        requests.delete(f"{BASE_URL}/todo/{todo_ids[1]}", headers=headers)
+        requests.delete(f"{BASE_URL}/note/{note_id}", headers=headers)
+        
+        print("测试分页拉取全部变更...")
+        cursor, pages, todos, tombstones = None, 0, {}, set()
+        while True:
+            page = sync(cursor, limit=2).json()
+            pages += 1
+            todos.update({todo["id"]: todo for todo in page["todos"]})
+            tombstones.update((tombstone["resource"], tombstone["id"]) for tombstone in page["tombstones"])
+            cursor = page["next_cursor"]
+            if not page["has_more"]:
+                break
+        # 4 条待办 + 2 条墓碑，每页 2 条
+        print(f"共 {pages} 页，待办 {sorted(todos)}，墓碑 {sorted(tombstones)}")
+        expected_todos = set(todo_ids) - {todo_ids[1]}
+        if set(todos) != expected_todos or tombstones != {("todo", todo_ids[1]), ("note", note_id)} or pages != 3:
+            print("✗ 分页同步结果不符合预期\n")
+            return False
+        if not todos[todo_ids[0]]["is_completed"]:
+            print("✗ 同步返回的不是记录的最新状态\n")
+            return False
+        page = sync(cursor).json()
+        if page["todos"] or page["tombstones"] or page["next_cursor"] != cursor:
+            print(f"✗ 没有新变更时游标应保持不变: {page}\n")
+            return False
+        
+        print("测试游标不会越过尚未提交的写入...")
+        
+        async def interleave(engine):
+            from app.models.todo import Todo
+            async with engine.connect() as connection:
+                transaction = await connection.begin()
+                # 先开始的事务尚未提交时，后提交的写入也不会返回，游标保持不变
+                result = await connection.execute(
+                    Todo.__table__.insert().values(
+                        family_id=family_id, creator_id=todos[todo_ids[0]]["creator_id"],
+                        title_ciphertext="pending", category="生活", is_completed=False,
+                        created_at=datetime.utcnow(), updated_at=datetime.utcnow()
+                    ).returning(Todo.id)
+                )
+                pending_id = result.scalar_one()
+                committed_id = requests.post(
+                    f"{BASE_URL}/todo/",
+                    json={"family_id": family_id, "title_ciphertext": "committed"},
+                    headers=headers
+                ).json()["id"]
+                while_pending = sync(cursor).json()
+                await transaction.commit()
+            return pending_id, committed_id, while_pending
+        
+        pending_id, committed_id, while_pending = run_with_database(interleave)
+        if while_pending["todos"] or while_pending["next_cursor"] != cursor:
+            print(f"✗ 未提交事务之后的写入不应返回: {while_pending}\n")
+            return False
+        page = sync(cursor).json()
+        if [todo["id"] for todo in page["todos"]] != [pending_id, committed_id]:
+            print(f"✗ 事务提交后应按写入事务顺序返回两条待办: {page}\n")
+            return False
+        
+        print("测试游标格式...")
+        if sync("0").status_code != 200 or sync("1:2:3").status_code != 400 or sync("abc").status_code != 400:
+            print("✗ 游标校验不符合预期\n")
+            return False
+        
+        print("\n✓ 增量同步成功\n")
+        return True
+    except requests.exceptions.ConnectionError:
+        print("✗ 无法连接到服务器\n")
+        return False
+
+
+def register_test_user(phone):
+    """注册并登录一个测试用户，返回访问令牌"""
+    private_key, public_key = generate_rsa_key_pair()
+    password = "test_password_123"
+    encrypted_private_key, salt = encrypt_private_key(password, private_key)
+    requests.post(f"{BASE_URL}/auth/register", json={
+        "phone": phone,
+        "username": f"user_{phone[-4:]}",
+        "password": password,
+        "public_key": get_public_key_pem(public_key),
+        "encrypted_private_key": encrypted_private_key,
+        "private_key_salt": salt
+    })
+    response = requests.post(f"{BASE_URL}/auth/login", json={"phone": phone, "password": password})
+    return response.json()["access_token"]
+
+
+def test_list_etag(token):
+    """测试列表 ETag：数据未变化时返回 304，同类资源写入后 ETag 变化，非成员不能用 ETag 探测"""
+    print("=" * 60)
+    print("测试列表 ETag")
+    print("=" * 60 + "\n")
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        family_id = create_test_family(headers, "etag_test")
+        todo_id = requests.post(
+            f"{BASE_URL}/todo/",
+            json={"family_id": family_id, "title_ciphertext": "title"},
+            headers=headers
+        ).json()["id"]
+        
+        def list_todos(etag=None, extra_headers=None, **params):
+            request_headers = dict(extra_headers or headers)
+            if etag:
+                request_headers["If-None-Match"] = etag
+            return requests.get(
+                f"{BASE_URL}/todo/", params={"family_id": family_id, **params}, headers=request_headers
+            )
+        
+        response = list_todos()
+        etag = response.headers.get("ETag")
+        print(f"ETag: {etag}")
+        if response.status_code != 200 or not etag:
+            print("✗ 列表响应缺少 ETag\n")
+            return False
+        
+        response = list_todos(etag)
+        if response.status_code != 304 or response.content:
+            print(f"✗ 数据未变化时应返回空响应体的 304，实际: {response.status_code}\n")
+            return False
+        if list_todos(etag, limit=10).status_code != 200:
+            print("✗ 查询参数不同的请求不应命中 ETag\n")
+            return False
+        
+        # 其它资源的写入不影响待办列表的 ETag
+        requests.post(
+            f"{BASE_URL}/note/",
+            json={"family_id": family_id, "title_ciphertext": "title", "content_ciphertext": "content"},
+            headers=headers
+        )
+        if list_todos(etag).status_code != 304:
+            print("✗ 便利贴写入不应改变待办列表的 ETag\n")
+            return False
+        
+        writes = [
+            ("创建", lambda: requests.post(
+                f"{BASE_URL}/todo/", json={"family_id": family_id, "title_ciphertext": "title2"}, headers=headers
+            )),
+            ("修改", lambda: requests.put(
+                f"{BASE_URL}/todo/{todo_id}", json={"is_completed": True}, headers=headers
+            )),
+            ("批量操作", lambda: requests.post(
+                f"{BASE_URL}/todo/batch",
+                json={"family_id": family_id, "operations": [{"op": "update", "id": todo_id, "title_ciphertext": "t"}]},
+                headers=headers
+            )),
+            ("删除", lambda: requests.delete(f"{BASE_URL}/todo/{todo_id}", headers=headers)),
+        ]
+        for name, write in writes:
+            write()
+            response = list_todos(etag)
+            new_etag = response.headers.get("ETag")
+            print(f"{name}后 ETag: {new_etag}")
+            if response.status_code != 200 or new_etag == etag:
+                print(f"✗ {name}待办后 ETag 应变化\n")
+                return False
+            etag = new_etag
+        
+        print("测试非成员携带 ETag...")
+        outsider = {"Authorization": f"Bearer {register_test_user('13900139000')}"}
+        response = list_todos(etag, extra_headers=outsider)
+        if response.status_code != 403:
+            print(f"✗ 非成员应返回 403，实际: {response.status_code}\n")
+            return False
+        
+        print("\n✓ 列表 ETag 测试成功\n")
+        return True
+    except requests.exceptions.ConnectionError:
+        print("✗ 无法连接到服务器\n")
+        return False
+
+
+def test_family_stats_and_repair(token):
+    """测试各种写入后 family_stats 计数与实际记录一致，以及 repair_family_stats 修正计数偏差"""
+    print("=" * 60)
+    print("测试家庭统计计数与修复")
+    print("=" * 60 + "\n")
+    
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        family_id = create_test_family(headers, "stats_test")
+        todo_ids = [
+            requests.post(
+                f"{BASE_URL}/todo/",
+                json={"family_id": family_id, "title_ciphertext": "title", "category": category},
+                headers=headers
+            ).json()["id"]
+            for category in ["生活", "生活", "学习", "运动", "心愿", "学习"]
+        ]
+        note_ids = [
+            requests.post(
+                f"{BASE_URL}/note/",
+                json={"family_id": family_id, "title_ciphertext": "title", "content_ciphertext": "content", "category": category},
+                headers=headers
+            ).json()["id"]
+            for category in ["药方", "地址信息", "药方"]
+        ]
+        
+        # 单条修改分类和完成状态（含重复完成、取消完成）、单条删除、批量修改与删除
+        requests.put(f"{BASE_URL}/todo/{todo_ids[0]}", json={"category": "学习", "is_completed": True}, headers=headers)
+        requests.put(f"{BASE_URL}/todo/{todo_ids[0]}", json={"is_completed": True}, headers=headers)
+        requests.put(f"{BASE_URL}/todo/{todo_ids[2]}", json={"is_completed": True}, headers=headers)
+        requests.put(f"{BASE_URL}/todo/{todo_ids[2]}", json={"is_completed": False}, headers=headers)
+        requests.put(f"{BASE_URL}/todo/{todo_ids[3]}", json={"is_completed": True}, headers=headers)
+        requests.delete(f"{BASE_URL}/todo/{todo_ids[3]}", headers=headers)
+        requests.post(
+            f"{BASE_URL}/todo/batch",
+            json={
+                "family_id": family_id,
+                "operations": [
+                    {"op": "update", "id": todo_ids[1], "category": "运动", "is_completed": True},
+                    {"op": "update", "id": todo_ids[4], "title_ciphertext": "title2"},
+                    {"op": "delete", "id": todo_ids[5]},
+                    {"op": "create", "title_ciphertext": "title", "category": "心愿"},
+                ]
+            },
+            headers=headers
+        )
+        requests.put(f"{BASE_URL}/note/{note_ids[0]}", json={"category": "API密钥"}, headers=headers)
+        requests.delete(f"{BASE_URL}/note/{note_ids[1]}", headers=headers)
+        
+        def expected_stats():
+            todos = requests.get(f"{BASE_URL}/todo/", params={"family_id": family_id}, headers=headers).json()
+            notes = requests.get(f"{BASE_URL}/note/", params={"family_id": family_id}, headers=headers).json()
+            
+            def by_category(items):
+                counts = {}
+                for item in items:
+                    counts[item["category"]] = counts.get(item["category"], 0) + 1
+                return counts
+            
+            return {
+                "todo": {
+                    "total": len(todos),
+                    "completed": sum(todo["is_completed"] for todo in todos),
+                    "by_category": by_category(todos)
+                },
+                "note": {"total": len(notes), "by_category": by_category(notes)},
+            }
+        
+        def current_stats():
+            return requests.get(f"{BASE_URL}/family/{family_id}/stats", headers=headers).json()
+        
+        expected = expected_stats()
+        stats = current_stats()
+        print(f"统计: {stats}")
+        if stats != expected:
+            print(f"✗ 统计与实际记录不一致，预期: {expected}\n")
+            return False
+        
+        print("测试修复计数偏差...")
+        
+        async def corrupt_and_repair(engine):
+            from sqlalchemy import update
+            from app.db.repair_stats import repair_family_stats
+            from app.models.change import FamilyStats
+            consistent = await repair_family_stats(family_id)
+            async with engine.begin() as connection:
+                await connection.execute(
+                    update(FamilyStats)
+                    .where(FamilyStats.family_id == family_id, FamilyStats.resource == "todo", FamilyStats.category == "学习")
+                    .values(total=FamilyStats.total + 5, completed=FamilyStats.completed + 5)
+                )
+            corrupted = current_stats()
+            return consistent, corrupted, await repair_family_stats(family_id)
+        
+        consistent, corrupted, drift = run_with_database(corrupt_and_repair)
+        print(f"修正的计数器: {drift}")
+        if consistent:
+            print(f"✗ 计数一致时不应有修正: {consistent}\n")
+            return False
+        if corrupted["todo"]["total"] != expected["todo"]["total"] + 5:
+            print("✗ 未能构造计数偏差\n")
+            return False
+        if list(drift) != [(family_id, "todo", "学习")] or current_stats() != expected:
+            print("✗ 修复后统计与实际记录不一致\n")
+            return False
+        
+        print("\n✓ 家庭统计计数与修复测试成功\n")
+        return True
+    except requests.exceptions.ConnectionError:
+        print("✗ 无法连接到服务器\n")
+        return False
+
+
 if __name__ == "__main__":
     token, public_key_pem = test_registration_and_login()
     
     if token and public_key_pem:
-        # 测试获取公钥
-        test_get_public_key("13800138000", public_key_pem)
-        
-        # 测试获取不存在用户的公钥
-        test_get_public_key_not_found()
+        results = [
+            # 测试获取公钥
+            test_get_public_key("13800138000", public_key_pem),
+            # 测试获取不存在用户的公钥
+            test_get_public_key_not_found(),
+            # 测试批量更新部分字段
+            test_batch_partial_updates(token),
+            # 测试并发修改分类
+            test_concurrent_category_moves(token),
+            # 测试并发批量操作
+            test_concurrent_batches(token),
+            # 测试同一家庭的并发写入
+            test_concurrent_family_writes(token),
+            # 测试增量同步
+            test_sync_paging_and_watermark(token),
+            # 测试列表 ETag
+            test_list_etag(token),
+            # 测试家庭统计计数与修复
+            test_family_stats_and_repair(token),
+        ]
         
         print("\n" + "=" * 60)
-        print("✓ 所有 API 测试通过！")
+        if all(results):
+            print("✓ 所有 API 测试通过！")
+        else:
+            print(f"✗ {results.count(False)} 项 API 测试失败")
         print("=" * 60)
     else:
         print("\n" + "=" * 60)